@@ -4,8 +4,17 @@ import json
 import math
 import time
 import random
-from collections import deque
+import gzip
+import hashlib
+import tempfile
+import argparse
+import heapq
+from collections import deque, OrderedDict
 import atexit
+import threading
+import queue
+import multiprocessing
+from multiprocessing import shared_memory
 import pygame
 
 # ------------------------------
@@ -25,6 +34,7 @@ ORANGE = (255, 165, 2)
 
 SAVE_FILE = "idle_blackjack_save.json"
 FPS_DEFAULT = 60
+BASE_ANG_SPEED = 2.2; SPEED_SCALE_PER_LEVEL = 0.18   # track speed (rad/s) and +18% per Speed level; garages use them too
 
 def clamp(v, lo, hi): return max(lo, min(hi, v))
 
@@ -39,7 +49,83 @@ def fmt_num(n):
         n /= 1000.0
     return f"{sign}{n:.1f}Sx"
 
-def now_ts(): return int(time.time())
+_time_source = time.time
+def now_ts(): return int(_time_source())
+def set_time_source(fn):
+    global _time_source
+    _time_source = fn or time.time
+
+# ------------------------------
+# Seeded RNG streams (one per subsystem so replays stay in lockstep)
+# ------------------------------
+class RngStreams:
+    NAMES = ("cars", "boost", "fx", "stars", "cards")
+    def __init__(self, seed=None): self.reseed(seed)
+    def reseed(self, seed=None):
+        self.seed = int(seed) if seed is not None else random.SystemRandom().randrange(1 << 32)
+        # String seeds hash deterministically across runs/platforms
+        for name in self.NAMES: setattr(self, name, random.Random(f"{self.seed}:{name}"))
+
+RNG = RngStreams()
+
+# ------------------------------
+# Telemetry (local JSONL, never blocks the frame loop)
+# ------------------------------
+TELEMETRY_DIR = "telemetry"
+
+class Telemetry:
+    """emit() enqueues without blocking (events are dropped when the queue is full); a daemon thread
+    writes them in batches to size-rotated telemetry-<session>-<n>.jsonl files."""
+    def __init__(self):
+        self.enabled = False; self.dropped = 0; self.q = None; self.thread = None
+    def start(self, directory=TELEMETRY_DIR, max_bytes=5_000_000, max_files=20, queue_size=20_000, batch=512):
+        if self.enabled: return
+        os.makedirs(directory, exist_ok=True)
+        self.dir = directory; self.max_bytes = max_bytes; self.max_files = max_files; self.batch = batch
+        self.session = f"{int(time.time())}-{os.getpid()}"; self.file_index = 0; self.f = None
+        self.q = queue.Queue(maxsize=queue_size); self.enabled = True
+        self.thread = threading.Thread(target=self._run, name="telemetry", daemon=True); self.thread.start()
+        self.emit("session_start", pid=os.getpid())
+    def emit(self, ev, **fields):
+        if not self.enabled: return
+        fields["ts"] = round(time.time(), 3); fields["ev"] = ev
+        try: self.q.put_nowait(fields)
+        except queue.Full: self.dropped += 1
+    def _open_next(self):
+        if self.f: self.f.close()
+        self.file_index += 1
+        self.f = open(os.path.join(self.dir, f"telemetry-{self.session}-{self.file_index:03d}.jsonl"), "a", encoding="utf-8")
+        # Keep only the newest max_files files (names sort chronologically)
+        files = sorted(n for n in os.listdir(self.dir) if n.startswith("telemetry-") and n.endswith(".jsonl"))
+        for old in files[:-self.max_files]:
+            try: os.remove(os.path.join(self.dir, old))
+            except OSError: pass
+    def _run(self):
+        self._open_next(); stop = False
+        while not stop:
+            try: items = [self.q.get(timeout=1.0)]
+            except queue.Empty: continue
+            while len(items) < self.batch:
+                try: items.append(self.q.get_nowait())
+                except queue.Empty: break
+            if items[-1] is None: items.pop(); stop = True
+            if not items: continue
+            try:
+                self.f.write("".join(json.dumps(it, separators=(",", ":")) + "\n" for it in items)); self.f.flush()
+                if self.f.tell() >= self.max_bytes: self._open_next()
+            except (OSError, TypeError, ValueError) as e:
+                print("Telemetry write failed:", e)
+        self.f.close()
+    def stop(self):
+        if not self.enabled: return
+        self.enabled = False
+        try:
+            # Shutdown may wait briefly for room; the frame loop is already gone
+            self.q.put({"dropped": self.dropped, "ts": round(time.time(), 3), "ev": "session_end"}, timeout=1.0); self.q.put(None, timeout=1.0)
+        except queue.Full: pass
+        self.thread.join(timeout=2.0)
+
+TELEMETRY = Telemetry()
 
 def draw_text(surface, text, font, color, pos, center=False):
     img = font.render(text, True, color)
@@ -82,6 +168,7 @@ class Button:
         self.visible = True
         self.hover = False
         self.accent = accent
+        self._text_key = None; self._text_surf = None
 
     def handle_event(self, event):
         if not self.visible or not self.enabled: return
@@ -102,7 +189,8 @@ class Button:
         if not self.enabled: edge = DARK_GREY
         pygame.draw.rect(surface, edge, self.rect, width=border, border_radius=12)
         col = WHITE if self.enabled else GREY
-        tw = self.font.render(self.text, True, col)
+        if self._text_key != (self.text, col): self._text_key = (self.text, col); self._text_surf = self.font.render(self.text, True, col)
+        tw = self._text_surf
         tr = tw.get_rect(center=self.rect.center)
         surface.blit(tw, tr)
 
@@ -119,32 +207,118 @@ class Button:
 class Particle:
     def __init__(self, x, y, color=YELLOW, speed=(60, 140), life=(0.4, 0.8), size=(2, 4)):
         self.x = x; self.y = y
-        ang = random.uniform(0, 2*math.pi)
-        spd = random.uniform(*speed)
+        ang = RNG.fx.uniform(0, 2*math.pi)
+        spd = RNG.fx.uniform(*speed)
         self.vx = math.cos(ang) * spd; self.vy = math.sin(ang) * spd
-        self.life = random.uniform(*life); self.age = 0.0
-        self.size = random.randint(size[0], size[1]); self.color = color
+        self.life = RNG.fx.uniform(*life); self.age = 0.0
+        self.size = RNG.fx.randint(size[0], size[1]); self.color = color
 
     def update(self, dt):
         self.age += dt; self.x += self.vx * dt; self.y += self.vy * dt
         return self.age < self.life
 
+    _sprites = {}   # (color, size, alpha) -> pre-drawn circle; a few hundred entries at most
     def draw(self, surface):
         alpha = clamp(int(255 * (1 - self.age / self.life)), 0, 255)
-        col = (*self.color, alpha)
-        s = pygame.Surface((self.size*2, self.size*2), pygame.SRCALPHA)
-        pygame.draw.circle(s, col, (self.size, self.size), self.size)
+        key = (self.color, self.size, alpha); s = Particle._sprites.get(key)
+        if s is None:
+            s = Particle._sprites[key] = pygame.Surface((self.size*2, self.size*2), pygame.SRCALPHA)
+            pygame.draw.circle(s, (*self.color, alpha), (self.size, self.size), self.size)
         surface.blit(s, (int(self.x)-self.size, int(self.y)-self.size))
 
 class Star:
     def __init__(self, w, h): self.reset(w, h)
     def reset(self, w, h):
-        self.x = random.randint(0, max(1, w-1)); self.y = random.randint(0, max(1, h-1))
-        self.base = random.randint(100, 200); self.phase = random.uniform(0, 2*math.pi); self.speed = random.uniform(0.2, 0.8)
+        self.x = RNG.stars.randint(0, max(1, w-1)); self.y = RNG.stars.randint(0, max(1, h-1))
+        self.base = RNG.stars.randint(100, 200); self.phase = RNG.stars.uniform(0, 2*math.pi); self.speed = RNG.stars.uniform(0.2, 0.8)
     def update(self, dt): self.phase += dt * self.speed
     def draw(self, surface):
-        b = clamp(self.base + int(55 * math.sin(self.phase)), 60, 255)
-        s = pygame.Surface((2,2), pygame.SRCALPHA); s.fill((b, b, b, b)); surface.blit(s, (self.x, self.y))
+        # Stars are drawn straight onto the black background, so alpha b over black is just a fill of b*b/255
+        b = clamp(self.base + int(55 * math.sin(self.phase)), 60, 255); v = b * b // 255
+        surface.fill((v, v, v), (self.x, self.y, 2, 2))
+
+# ------------------------------
+# Notifications
+# ------------------------------
+class Toasts:
+    """Live toasts keyed by text: a repeat bumps the count and restarts the timer instead of stacking.
+    Expiry is one FIFO of (expires, text) per duration, so each stays sorted and push/expire are O(1);
+    entries made stale by a restart are skipped when popped."""
+    MAX_VISIBLE = 6; FADE = 0.5
+    def __init__(self): self.live = OrderedDict(); self.expiry = {}; self.clock = 0.0
+    def push(self, text, dur=2.8):
+        toast = self.live.get(text)
+        if toast and toast["expires"] > self.clock: toast["count"] += 1; toast["surf"] = None; self.live.move_to_end(text)
+        else: self.live.pop(text, None); toast = self.live[text] = {"text": text, "count": 1, "surf": None}   # new, or replaces an expired one
+        toast["start"] = self.clock; toast["dur"] = dur; toast["expires"] = self.clock + dur
+        self.expiry.setdefault(dur, deque()).append((toast["expires"], text))
+    def update(self, dt):
+        self.clock += dt
+        for fifo in self.expiry.values():
+            while fifo and fifo[0][0] <= self.clock:
+                expires, text = fifo.popleft(); toast = self.live.get(text)
+                if toast and toast["expires"] == expires: del self.live[text]
+    def visible(self):
+        # Newest MAX_VISIBLE still-live toasts, oldest first (surf is the renderer's cached surface)
+        out = []
+        for text in reversed(self.live):
+            toast = self.live[text]
+            if toast["expires"] > self.clock: out.append(toast)
+            if len(out) >= self.MAX_VISIBLE: break
+        return out[::-1]
+    def alpha(self, toast): return clamp((toast["expires"] - self.clock) / self.FADE, 0.0, 1.0)
+    def label(self, toast): return toast["text"] + (f"  ×{toast['count']}" if toast["count"] > 1 else "")
+
+# ------------------------------
+# Income history (bounded, multi-resolution)
+# ------------------------------
+class HistoryTier:
+    def __init__(self, name, seconds, capacity): self.name = name; self.seconds = seconds; self.rows = deque(maxlen=capacity)
+
+class IncomeHistory:
+    """Ring buffers of (gold, gold/sec, laps/sec, cars) per second, minute and hour; each tier rolls up from the finer one."""
+    FIELDS = ("gold", "gps", "lps", "cars")
+    TIERS = (("sec", 1, 300), ("min", 60, 240), ("hour", 3600, 720))   # 5 min, 4 h, 30 days
+
+    def __init__(self):
+        self.tiers = [HistoryTier(*t) for t in self.TIERS]; self.by_name = {t.name: t for t in self.tiers}
+        self._pending = [[] for _ in self.tiers[1:]]   # closed rows not yet rolled into the next tier
+        self._acc = 0.0; self._last_earned = None; self._last_laps = None
+        self.version = 0   # bumps whenever a bucket closes
+
+    def update(self, dt, gs):
+        # Rates count track income only: spending, Blackjack payouts and offline earnings never reach the chart
+        if self._last_earned is None: self._last_earned = gs.idle_gold_earned; self._last_laps = gs.laps_total
+        self._acc += dt
+        if self._acc < 1.0: return False
+        el = self._acc; self._acc = 0.0
+        row = (gs.gold, (gs.idle_gold_earned - self._last_earned) / el, (gs.laps_total - self._last_laps) / el, gs.cars)
+        self._last_earned = gs.idle_gold_earned; self._last_laps = gs.laps_total
+        self._push(0, row); self.version += 1
+        return True
+
+    def _push(self, i, row):
+        self.tiers[i].rows.append(row)
+        if i + 1 >= len(self.tiers): return
+        pend = self._pending[i]; pend.append(row)
+        if len(pend) * self.tiers[i].seconds >= self.tiers[i + 1].seconds:
+            # Levels (gold, cars) keep the closing value; rates are averaged
+            n = len(pend); rolled = (pend[-1][0], sum(r[1] for r in pend) / n, sum(r[2] for r in pend) / n, pend[-1][3])
+            self._pending[i] = []; self._push(i + 1, rolled)
+
+    def series(self, tier, field): k = self.FIELDS.index(field); return [r[k] for r in self.by_name[tier].rows]
+    def latest(self, tier, field):
+        rows = self.by_name[tier].rows
+        return rows[-1][self.FIELDS.index(field)] if rows else 0.0
+
+    def to_dict(self):
+        return {"tiers": {t.name: [list(r) for r in t.rows] for t in self.tiers}, "pending": [[list(r) for r in p] for p in self._pending]}
+    def from_dict(self, d):
+        for t in self.tiers:
+            t.rows.clear(); t.rows.extend(tuple(r) for r in d.get("tiers", {}).get(t.name, []))
+        pend = d.get("pending", [])
+        self._pending = [[tuple(r) for r in (pend[i] if i < len(pend) else [])] for i in range(len(self.tiers) - 1)]
+        self._acc = 0.0; self._last_earned = None; self._last_laps = None; self.version += 1
 
 # ------------------------------
 # Game State
@@ -152,17 +326,20 @@ class Star:
 class GameState:
     def __init__(self, w, h):
         self.gold = 0.0; self.lifetime_gold_earned = 0.0
+        self.idle_gold_earned = 0.0   # laps + auto-clicker only (not saved); drives the income history
         self.cars = 1; self.speed_level = 1; self.payout_level = 1
         self.gold_mult_level = 0; self.autoclicker_level = 0; self.offline_level = 0
         self.sponsor_level = 0; self.blackjack_unlocked = False
 
         self.base_car_cost = 10; self.base_speed_cost = 20; self.base_payout_cost = 200
         self.base_auto_cost = 500; self.base_mult_cost = 2000; self.base_offline_cost = 2000
+        self.base_garage_cost = 250_000; self.base_garage_car_cost = 5_000; self.base_garage_tune_cost = 10_000
         self.cost_mul = 1.35
         self.mult_cost_mul = 1.65
 
-        self.base_ang_speed = 2.2; self.speed_scale_per_level = 0.18
-        self._gps_last_gold = 0.0; self._gps_last_time = time.time(); self.gps_smoothed = 0.0
+        self.base_ang_speed = BASE_ANG_SPEED; self.speed_scale_per_level = SPEED_SCALE_PER_LEVEL
+        self.version = 0; self._derived_version = -1   # see _recompute
+        self.history = IncomeHistory()
 
         self.autosave = True; self.enable_particles = True; self.fps_cap = FPS_DEFAULT
         self.last_save_ts = now_ts()
@@ -170,92 +347,193 @@ class GameState:
         self.cars_list = []; self.init_cars()
         self.achievements = {}; self.prestige_points = 0; self.laps_total = 0
         self.bj_stats = {"games": 0, "wins": 0}; self.track_type = 0
-        self.notifications = deque(); self.stars = [Star(w, h) for _ in range(160)]
-        self._autosave_accum = 0.0
+        self.toasts = Toasts(); self.stars = [Star(w, h) for _ in range(160)]
+        self._autosave_accum = 0.0; self.save_path = SAVE_FILE
+        self.auto_buy = False; self.autobuyer = AutoBuyer(self); self.garages = []
 
     def gold_per_all_cars_rev(self):
-        return self.gold_per_lap() * self.cars
+        if self._derived_version != self.version: self._recompute()
+        return self._gold_per_lap * self.cars
 
     def re_seed_stars(self, w, h): self.stars = [Star(w, h) for _ in range(160)]
     def init_cars(self):
         self.cars_list.clear()
         for _ in range(self.cars):
-            t = random.uniform(0, 2*math.pi)
-            col = (random.randint(170,255), random.randint(170,255), random.randint(170,255))
-            size = random.randint(8, 13); var = random.uniform(0.9, 1.15)
-            self.cars_list.append({"t": t, "col": col, "size": size, "var": var, "boost":0.0, "cooldown":random.uniform(0.5,2.5), "trail": deque(maxlen=24)})
-
-    def get_car_cost(self): return int(self.base_car_cost * (self.cost_mul ** (self.cars - 1)))
-    def get_speed_cost(self): return int(self.base_speed_cost * (self.cost_mul ** (self.speed_level - 1)))
-    def get_payout_cost(self): return int(self.base_payout_cost * (self.cost_mul ** (self.payout_level - 1)))
-    def get_auto_cost(self): return int(self.base_auto_cost * (self.cost_mul ** (self.autoclicker_level)))
+            t = RNG.cars.uniform(0, 2*math.pi)
+            col = (RNG.cars.randint(170,255), RNG.cars.randint(170,255), RNG.cars.randint(170,255))
+            size = RNG.cars.randint(8, 13); var = RNG.cars.uniform(0.9, 1.15)
+            self.cars_list.append({"t": t, "col": col, "size": size, "var": var, "boost":0.0, "cooldown":RNG.cars.uniform(0.5,2.5), "trail": deque(maxlen=24)})
+
+    def bump(self):
+        # Call after any level/prestige/achievement change; the derived values below are recomputed on next use
+        self.version += 1
+    def _recompute(self):
+        # Costs, rates and labels depend only on levels, prestige and achievements, so they change only with
+        # self.version; the getters check it once and read these plain attributes
+        self._car_cost = int(self.base_car_cost * (self.cost_mul ** (self.cars - 1)))
+        self._speed_cost = int(self.base_speed_cost * (self.cost_mul ** (self.speed_level - 1)))
+        self._payout_cost = int(self.base_payout_cost * (self.cost_mul ** (self.payout_level - 1)))
+        self._auto_cost = int(self.base_auto_cost * (self.cost_mul ** (self.autoclicker_level)))
+        self._mult_cost = int(self.base_mult_cost * (self.mult_cost_mul ** (self.gold_mult_level)))   # faster-than-Ads escalation
+        self._offline_cost = int(self.base_offline_cost * (self.cost_mul ** (self.offline_level)))
+        self._garage_cost = int(self.base_garage_cost * (10 ** len(self.garages)))
+        g = self.garage_target("cars"); self._garage_car_cost = int(self.base_garage_car_cost * (self.cost_mul ** (g["cars"] - 1))) if g else 0
+        g = self.garage_target("speed_level"); self._garage_tune_cost = int(self.base_garage_tune_cost * (self.cost_mul ** (g["speed_level"] - 1))) if g else 0
+        self._gold_mult = self.gold_multiplier_at(self.payout_level, self.gold_mult_level)
+        self._gold_per_lap = 1.0 * self._gold_mult
+        self._ang_speed = self.ang_speed_at(self.speed_level)
+        self._auto_gold_per_sec = self.autoclicker_level * 1.0 * self._gold_mult
+        self._labels = {
+            "add_car": f"Buy Car ({fmt_num(self._car_cost)})",
+            "upgrade_speed": f"Upgrade Speed ({fmt_num(self._speed_cost)})",
+            "upgrade_payout": f"Track Ads ({fmt_num(self._payout_cost)})",
+            "upgrade_auto": f"Auto-Clicker Lv{self.autoclicker_level} ({fmt_num(self._auto_cost)})",
+            "upgrade_multiplier": f"Gold Mult ×1.5^{self.gold_mult_level} ({fmt_num(self._mult_cost)})",
+            "upgrade_offline": f"Offline Boost Lv{self.offline_level} ({fmt_num(self._offline_cost)})",
+            "open_garage": f"Garage {fmt_num(self._garage_cost)}" if len(self.garages) < MAX_GARAGES else f"Garages {MAX_GARAGES}/{MAX_GARAGES}",
+            "add_garage_car": f"Car {fmt_num(self._garage_car_cost)}" if self.garages else "Car -",
+            "tune_garage": f"Tune {fmt_num(self._garage_tune_cost)}" if self.garages else "Tune -",
+        }
+        self._derived_version = self.version
+    def bought(self, item, cost, level): self.bump(); TELEMETRY.emit("purchase", item=item, cost=cost, level=level, gold=round(self.gold, 2))
+
+    def get_car_cost(self):
+        if self._derived_version != self.version: self._recompute()
+        return self._car_cost
+    def get_speed_cost(self):
+        if self._derived_version != self.version: self._recompute()
+        return self._speed_cost
+    def get_payout_cost(self):
+        if self._derived_version != self.version: self._recompute()
+        return self._payout_cost
+    def get_auto_cost(self):
+        if self._derived_version != self.version: self._recompute()
+        return self._auto_cost
     def get_mult_cost(self):
-        # Faster-than-Ads escalation
-        return int(self.base_mult_cost * (self.mult_cost_mul ** (self.gold_mult_level)))
-    def get_offline_cost(self): return int(self.base_offline_cost * (self.cost_mul ** (self.offline_level)))
+        if self._derived_version != self.version: self._recompute()
+        return self._mult_cost
+    def get_offline_cost(self):
+        if self._derived_version != self.version: self._recompute()
+        return self._offline_cost
 
     def gold_multiplier_total(self):
+        if self._derived_version != self.version: self._recompute()
+        return self._gold_mult
+    def gold_multiplier_at(self, payout_level, gold_mult_level):
+        # Uncached: also prices hypothetical upgrades (auto-buyer) without mutating state
         # Existing bonuses
-        payout_bonus = (1 + 0.25 * (self.payout_level - 1))        # Track Ads
+        payout_bonus = (1 + 0.25 * (payout_level - 1))        # Track Ads
         sponsor_bonus = (1 + 0.5 * self.sponsor_level)             # Prestige (sponsor) bonus
         prestige_point_bonus = (1 + 0.05 * self.prestige_points)   # Achievement PP bonus
 
         # NEW: Multiplier rework
         # - Base scaling: 1.5^level (instead of 2^level)
         # - Synergy: each Ads level makes Multiplier ~10% stronger
-        mult_synergy = 1 + 0.10 * self.payout_level
-        gold_mult_component = (1.5 ** self.gold_mult_level) * mult_synergy
+        mult_synergy = 1 + 0.10 * payout_level
+        gold_mult_component = (1.5 ** gold_mult_level) * mult_synergy
 
         return payout_bonus * sponsor_bonus * prestige_point_bonus * gold_mult_component
 
-    def gold_per_lap(self): return 1.0 * self.gold_multiplier_total()
-    def ang_speed(self): return self.base_ang_speed * (1 + self.speed_scale_per_level*(self.speed_level - 1))
+    def gold_per_lap(self):
+        if self._derived_version != self.version: self._recompute()
+        return self._gold_per_lap
+    def ang_speed(self):
+        if self._derived_version != self.version: self._recompute()
+        return self._ang_speed
+    def ang_speed_at(self, speed_level): return self.base_ang_speed * (1 + self.speed_scale_per_level*(speed_level - 1))
     def laps_per_sec_per_car(self): return self.ang_speed() / (2*math.pi)
-    def auto_gold_per_sec(self): return self.autoclicker_level * 1.0 * self.gold_multiplier_total()
+    def auto_gold_per_sec(self):
+        if self._derived_version != self.version: self._recompute()
+        return self._auto_gold_per_sec
+    def projected_gps(self, cars=None, speed_level=None, payout_level=None, autoclicker_level=None, gold_mult_level=None):
+        # Expected gold/sec (laps + auto-clicker) at the given levels, uncached (auto-buyer scoring only);
+        # ignores random boosts and speed variance
+        cars = self.cars if cars is None else cars
+        speed_level = self.speed_level if speed_level is None else speed_level
+        payout_level = self.payout_level if payout_level is None else payout_level
+        autoclicker_level = self.autoclicker_level if autoclicker_level is None else autoclicker_level
+        gold_mult_level = self.gold_mult_level if gold_mult_level is None else gold_mult_level
+        laps = cars * (self.ang_speed_at(speed_level) / (2*math.pi))
+        return (laps + autoclicker_level * 1.0) * self.gold_multiplier_at(payout_level, gold_mult_level)
 
     def add_car(self):
         cost = self.get_car_cost()
         if self.gold >= cost:
-            self.gold -= cost; self.cars += 1
-            t = random.uniform(0, 2*math.pi)
-            col = (random.randint(170,255), random.randint(170,255), random.randint(170,255))
-            size = random.randint(8, 13); var = random.uniform(0.9, 1.15)
+            self.gold -= cost; self.cars += 1; self.bought("car", cost, self.cars)
+            t = RNG.cars.uniform(0, 2*math.pi)
+            col = (RNG.cars.randint(170,255), RNG.cars.randint(170,255), RNG.cars.randint(170,255))
+            size = RNG.cars.randint(8, 13); var = RNG.cars.uniform(0.9, 1.15)
             self.cars_list.append({"t": t, "col": col, "size": size, "var": var, "boost":0.0, "cooldown":1.5, "trail": deque(maxlen=24)})
             self.notify("Purchased a car 🚗")
 
     def upgrade_speed(self):
         cost = self.get_speed_cost()
-        if self.gold >= cost: self.gold -= cost; self.speed_level += 1; self.notify("Speed upgraded ⚡")
+        if self.gold >= cost: self.gold -= cost; self.speed_level += 1; self.bought("speed", cost, self.speed_level); self.notify("Speed upgraded ⚡")
     def upgrade_payout(self):
         cost = self.get_payout_cost()
-        if self.gold >= cost: self.gold -= cost; self.payout_level += 1; self.notify("Track Ads improved 💰")
+        if self.gold >= cost: self.gold -= cost; self.payout_level += 1; self.bought("ads", cost, self.payout_level); self.notify("Track Ads improved 💰")
     def upgrade_auto(self):
         cost = self.get_auto_cost()
-        if self.gold >= cost: self.gold -= cost; self.autoclicker_level += 1; self.notify("Auto-Clicker upgraded 🤖")
+        if self.gold >= cost: self.gold -= cost; self.autoclicker_level += 1; self.bought("auto", cost, self.autoclicker_level); self.notify("Auto-Clicker upgraded 🤖")
     def upgrade_multiplier(self):
         cost = self.get_mult_cost()
-        if self.gold >= cost: self.gold -= cost; self.gold_mult_level += 1; self.notify("Gold Multiplier +1 (x1.5 + 10%/Ads level) ✨")
+        if self.gold >= cost: self.gold -= cost; self.gold_mult_level += 1; self.bought("mult", cost, self.gold_mult_level); self.notify("Gold Multiplier +1 (x1.5 + 10%/Ads level) ✨")
     def upgrade_offline(self):
         cost = self.get_offline_cost()
-        if self.gold >= cost: self.gold -= cost; self.offline_level += 1; self.notify("Offline Earnings boosted ⏱️")
+        if self.gold >= cost: self.gold -= cost; self.offline_level += 1; self.bought("offline", cost, self.offline_level); self.notify("Offline Earnings boosted ⏱️")
+
+    def award_laps(self, n):
+        # Batched lap events (garage shards); same economy as award_lap
+        if n <= 0: return
+        g = n * self.gold_per_lap()
+        self.gold += g; self.lifetime_gold_earned += g; self.idle_gold_earned += g; self.laps_total += n
+        if not self.blackjack_unlocked and self.gold >= 1000: self.blackjack_unlocked = True
 
     def award_lap(self, amount=None):
         g = amount if amount is not None else self.gold_per_lap()
-        self.gold += g; self.lifetime_gold_earned += g; self.laps_total += 1
+        self.gold += g; self.lifetime_gold_earned += g; self.idle_gold_earned += g; self.laps_total += 1
         if not self.blackjack_unlocked and self.gold >= 1000: self.blackjack_unlocked = True
 
+    # Garages: extra tracks with their own fleet & speed level, unlocked after the first prestige; kept across prestige
+    def garages_unlocked(self): return self.sponsor_level >= 1
+    def get_garage_cost(self):
+        if self._derived_version != self.version: self._recompute()
+        return self._garage_cost
+    def garage_target(self, key):
+        # Garage whose `key` level is lowest -- the one the Garage Car / Tune-up buttons upgrade next
+        return min(self.garages, key=lambda g: g[key]) if self.garages else None
+    def get_garage_car_cost(self):
+        if self._derived_version != self.version: self._recompute()
+        return self._garage_car_cost
+    def get_garage_tune_cost(self):
+        if self._derived_version != self.version: self._recompute()
+        return self._garage_tune_cost
+    def open_garage(self):
+        if not self.garages_unlocked() or len(self.garages) >= MAX_GARAGES: return
+        cost = self.get_garage_cost()
+        if self.gold >= cost:
+            self.gold -= cost; self.garages.append({"track_type": (self.track_type + 1 + len(self.garages)) % 4, "cars": 1, "speed_level": 1})
+            self.bought("garage", cost, len(self.garages)); self.notify(f"Garage {len(self.garages)} opened 🏁")
+    def add_garage_car(self):
+        g = self.garage_target("cars"); cost = self.get_garage_car_cost()
+        if g and g["cars"] < MAX_GARAGE_CARS and self.gold >= cost: self.gold -= cost; g["cars"] += 1; self.bought("garage_car", cost, g["cars"]); self.notify("Garage car purchased 🚙")
+    def tune_garage(self):
+        g = self.garage_target("speed_level"); cost = self.get_garage_tune_cost()
+        if g and self.gold >= cost: self.gold -= cost; g["speed_level"] += 1; self.bought("garage_tune", cost, g["speed_level"]); self.notify("Garage tuned up 🔧")
+
     def prestige_available(self): return self.gold >= 1_000_000
     def do_prestige(self):
         if self.prestige_available():
+            TELEMETRY.emit("prestige", sponsor_level=self.sponsor_level + 1, gold=round(self.gold, 2), lifetime=round(self.lifetime_gold_earned, 2))
             self.sponsor_level += 1
             self.gold = 0.0; self.cars = 1; self.speed_level = 1; self.payout_level = 1
-            self.gold_mult_level = 0; self.autoclicker_level = 0
+            self.gold_mult_level = 0; self.autoclicker_level = 0; self.bump()
             self.init_cars(); self.notify(f"Prestiged! Sponsor level {self.sponsor_level} 🏆")
 
     def unlock_achievement(self, name, pp=1):
         if name not in self.achievements or not self.achievements[name]["unlocked"]:
             self.achievements[name] = {"unlocked": True, "pp_awarded": True}
-            self.prestige_points += pp; self.notify(f"Achievement: {name} (+{pp} PP) 🥇")
+            self.prestige_points += pp; self.bump(); TELEMETRY.emit("achievement", name=name, pp=pp); self.notify(f"Achievement: {name} (+{pp} PP) 🥇")
 
     def check_achievements(self):
         checks = [
@@ -283,6 +561,7 @@ class GameState:
             "blackjack_unlocked": self.blackjack_unlocked, "last_save_ts": now_ts(), "achievements": self.achievements,
             "prestige_points": self.prestige_points, "laps_total": self.laps_total, "bj_stats": self.bj_stats,
             "autosave": self.autosave, "enable_particles": self.enable_particles, "fps_cap": self.fps_cap, "track_type": self.track_type,
+            "auto_buy": self.auto_buy, "history": self.history.to_dict(), "garages": self.garages,
         }
     def from_dict(self, d):
         self.gold = float(d.get("gold", 0.0)); self.lifetime_gold_earned = float(d.get("lifetime_gold_earned", 0.0))
@@ -294,10 +573,17 @@ class GameState:
         self.bj_stats = d.get("bj_stats", {"games":0,"wins":0})
         self.autosave = bool(d.get("autosave", True)); self.enable_particles = bool(d.get("enable_particles", True))
         self.fps_cap = int(d.get("fps_cap", FPS_DEFAULT)); self.track_type = int(d.get("track_type", 0))
+        self.auto_buy = bool(d.get("auto_buy", False)); self.history.from_dict(d.get("history", {}))
+        self.garages = [{"track_type": int(g.get("track_type", 0)), "cars": clamp(int(g.get("cars", 1)), 1, MAX_GARAGE_CARS),
+                         "speed_level": int(g.get("speed_level", 1))} for g in d.get("garages", [])[:MAX_GARAGES]]
+        self.bump()
         self.init_cars()
-    def save(self, path=SAVE_FILE):
+    def save(self, path=None):
+        path = path or self.save_path; t0 = time.perf_counter()
         with open(path, "w", encoding="utf-8") as f: json.dump(self.to_dict(), f, indent=2)
-    def load(self, path=SAVE_FILE):
+        TELEMETRY.emit("save", ms=round((time.perf_counter() - t0) * 1000, 3), bytes=os.path.getsize(path))
+    def load(self, path=None):
+        path = path or self.save_path; t0 = time.perf_counter()
         if not os.path.exists(path): return False, 0
         try:
             with open(path, "r", encoding="utf-8") as f: data = json.load(f)
@@ -316,9 +602,10 @@ class GameState:
                 # if anything odd happens with notifications, fail silently
                 pass
 
+            TELEMETRY.emit("load", ok=True, ms=round((time.perf_counter() - t0) * 1000, 3), offline_seconds=elapsed, offline_earned=round(earned, 2))
             return True, earned
         except Exception as e:
-            print("Load failed:", e); return False, 0
+            TELEMETRY.emit("load", ok=False, error=str(e)); print("Load failed:", e); return False, 0
     def tick_autosave(self, dt):
         if not self.autosave: return False
         self._autosave_accum += dt
@@ -327,19 +614,202 @@ class GameState:
             try: self.save(); self.notify("Autosaved 💾"); return True
             except Exception as e: print("Autosave failed:", e)
         return False
-    def notify(self, text, dur=2.8): self.notifications.append({"text": text, "t": 0.0, "dur": dur})
-    def update_notifications(self, dt):
-        if not self.notifications: return
-        kept = deque()
-        for n in list(self.notifications):
-            n["t"] += dt
-            if n["t"] < n["dur"]: kept.append(n)
-        self.notifications = kept
-    def update_gps(self):
-        t = time.time(); dt = max(1e-6, t - self._gps_last_time)
-        delta = self.gold - self._gps_last_gold; inst = clamp(delta / dt, -1e12, 1e12)
-        alpha = 0.2; self.gps_smoothed = (1-alpha)*self.gps_smoothed + alpha*inst
-        self._gps_last_gold = self.gold; self._gps_last_time = t
+    def notify(self, text, dur=2.8): self.toasts.push(text, dur)
+    def update_notifications(self, dt): self.toasts.update(dt)
+    def upgrade_labels(self):
+        if self._derived_version != self.version: self._recompute()
+        return self._labels
+    def update_history(self, dt):
+        if not self.history.update(dt, self): return False
+        # One batched lap/income event per closed 1s bucket rather than one per award_lap
+        gold, gps, lps, cars = self.history.tiers[0].rows[-1]
+        TELEMETRY.emit("laps", lps=round(lps, 3), gps=round(gps, 3), gold=round(gold, 2), cars=cars, laps_total=self.laps_total)
+        return True
+    def gold_per_sec(self): return self.history.latest("sec", "gps")
+
+# ------------------------------
+# Auto-buyer
+# ------------------------------
+class AutoBuyer:
+    """Greedy ROI buyer: a max-heap of marginal gold/sec per gold spent, re-scored only when levels change."""
+    # upgrade method -> (cost getter, level field)
+    UPGRADES = {
+        "add_car": ("get_car_cost", "cars"),
+        "upgrade_speed": ("get_speed_cost", "speed_level"),
+        "upgrade_payout": ("get_payout_cost", "payout_level"),
+        "upgrade_auto": ("get_auto_cost", "autoclicker_level"),
+        "upgrade_multiplier": ("get_mult_cost", "gold_mult_level"),
+        "upgrade_offline": ("get_offline_cost", "offline_level"),
+    }
+    # level field -> upgrades whose score depends on it (gps = (cars*laps + auto) * multiplier)
+    AFFECTS = {
+        "cars": ("add_car", "upgrade_speed", "upgrade_payout", "upgrade_multiplier"),
+        "speed_level": ("add_car", "upgrade_speed", "upgrade_payout", "upgrade_multiplier"),
+        "payout_level": ("add_car", "upgrade_speed", "upgrade_payout", "upgrade_auto", "upgrade_multiplier"),
+        "autoclicker_level": ("upgrade_auto", "upgrade_payout", "upgrade_multiplier"),
+        "gold_mult_level": ("add_car", "upgrade_speed", "upgrade_payout", "upgrade_auto", "upgrade_multiplier"),
+        "offline_level": ("upgrade_offline",),
+    }
+    FIELDS = ("cars", "speed_level", "payout_level", "autoclicker_level", "gold_mult_level", "offline_level", "sponsor_level", "prestige_points")
+
+    def __init__(self, gs):
+        self.gs = gs; self.heap = []; self.gen = {name: 0 for name in self.UPGRADES}; self._sig = None; self._version = None
+
+    def score(self, name):
+        # Offline earnings add nothing to live gold/sec, so they score 0 and are never auto-bought
+        gs = self.gs; cost_fn, field = self.UPGRADES[name]
+        if field == "offline_level": return 0.0
+        gain = gs.projected_gps(**{field: getattr(gs, field) + 1}) - gs.projected_gps()
+        return gain / max(1, getattr(gs, cost_fn)())
+
+    def push(self, name):
+        # Bumping the generation lazily invalidates any older heap entry for this upgrade
+        self.gen[name] += 1; heapq.heappush(self.heap, (-self.score(name), self.gen[name], name))
+
+    def refresh(self):
+        if self._version == self.gs.version: return
+        self._version = self.gs.version
+        sig = tuple(getattr(self.gs, f) for f in self.FIELDS)
+        if sig == self._sig: return
+        prev = self._sig; self._sig = sig
+        if prev is None or sig[6:] != prev[6:]:
+            # Prestige/achievements move every multiplier (and prestige resets levels): rebuild
+            dirty = set(self.UPGRADES); self.heap = []
+        else:
+            dirty = set()
+            for f, a, b in zip(self.FIELDS, prev, sig):
+                if a != b: dirty.update(self.AFFECTS[f])
+        for name in dirty: self.push(name)
+        if len(self.heap) > 4 * len(self.UPGRADES):
+            self.heap = [e for e in self.heap if e[1] == self.gen[e[2]]]; heapq.heapify(self.heap)
+
+    def best(self):
+        self.refresh()
+        while self.heap and self.heap[0][1] != self.gen[self.heap[0][2]]: heapq.heappop(self.heap)
+        if not self.heap or self.heap[0][0] >= 0: return None
+        return self.heap[0][2]
+
+    def tick(self):
+        # Buy the top-ranked upgrade as soon as it is affordable; cheaper, worse options are skipped
+        name = self.best()
+        if name is None: return None
+        if self.gs.gold >= getattr(self.gs, self.UPGRADES[name][0])():
+            getattr(self.gs, name)(); return name
+        return None
+
+# ------------------------------
+# Garages (one fleet simulation per shard, in worker processes)
+# ------------------------------
+MAX_GARAGES = 4; MAX_GARAGE_CARS = 64; GARAGE_STEP = 1/120
+# Shared float64 block per shard. Control slots are written only by the main process,
+# state slots only by the shard; state is published under a seqlock (odd seq = write in progress).
+G_TARGET, G_CARS, G_SPEED, G_STOP, G_SEQ, G_TIME, G_LAPS, G_N, G_T = range(9)
+GARAGE_SLOTS = G_T + MAX_GARAGE_CARS
+
+def garage_car_traits(seed, index, k):
+    # Shared by worker and renderer so both agree on every car without exchanging it
+    rng = random.Random(f"{seed}:garage{index}:{k}")
+    col = (rng.randint(170,255), rng.randint(170,255), rng.randint(170,255))
+    return {"t": rng.uniform(0, 2*math.pi), "col": col, "size": rng.randint(5, 8), "var": rng.uniform(0.9, 1.15)}
+
+class GarageSim:
+    def __init__(self, seed, index):
+        self.seed = seed; self.index = index; self.rng = random.Random(f"{seed}:garage{index}")
+        self.time = 0.0; self.laps = 0; self.cars = []; self.speed_level = 1
+    def set_fleet(self, cars, speed_level):
+        self.speed_level = speed_level
+        while len(self.cars) < cars:
+            car = garage_car_traits(self.seed, self.index, len(self.cars)); car["boost"] = 0.0; car["cooldown"] = 1.5; self.cars.append(car)
+    def step(self, dt):
+        # Mirrors IdleScene's car update (random boosts, lap on wrap) without trails or particles
+        # Must match GameState.ang_speed_at so garage income agrees with projected_gps
+        ang_speed = BASE_ANG_SPEED * (1 + SPEED_SCALE_PER_LEVEL * (self.speed_level - 1))
+        for car in self.cars:
+            if car["cooldown"] > 0: car["cooldown"] -= dt
+            if car["boost"] > 0: car["boost"] -= dt
+            elif car["cooldown"] <= 0 and self.rng.random() < 0.4*dt: car["boost"] = self.rng.uniform(0.8, 1.4); car["cooldown"] = self.rng.uniform(2.5, 5.5)
+            prev_t = car["t"]; car["t"] = (car["t"] + ang_speed * car["var"] * (1.8 if car["boost"] > 0 else 1.0) * dt) % (2*math.pi)
+            if prev_t > math.pi*1.5 and car["t"] < math.pi*0.5: self.laps += 1
+        self.time += dt
+    def pump(self, buf):
+        # Advance to the main process' target game time, then publish; returns False when already caught up
+        target = buf[G_TARGET]
+        if self.time >= target: return False
+        self.set_fleet(int(buf[G_CARS]), int(buf[G_SPEED]))
+        while self.time < target: self.step(min(GARAGE_STEP, target - self.time))
+        buf[G_SEQ] += 1
+        buf[G_TIME] = self.time; buf[G_LAPS] = self.laps; buf[G_N] = len(self.cars)
+        for i, car in enumerate(self.cars): buf[G_T + i] = car["t"]
+        buf[G_SEQ] += 1
+        return True
+
+def garage_worker(shm_name, seed, index):
+    shm = shared_memory.SharedMemory(name=shm_name); buf = shm.buf.cast("d"); sim = GarageSim(seed, index)
+    parent = multiprocessing.parent_process()
+    try:
+        while buf[G_STOP] == 0 and (parent is None or parent.is_alive()):
+            if not sim.pump(buf): time.sleep(0.001)
+    finally:
+        buf.release(); shm.close()
+
+class GarageShard:
+    def __init__(self, seed, index, ctx=None):
+        self.seed = seed; self.index = index; self.shm = None; self.proc = None; self.sim = None
+        self.awarded = 0; self.snapshot = (0.0, 0, [])
+        if ctx is not None:
+            self.shm = shared_memory.SharedMemory(create=True, size=GARAGE_SLOTS * 8); self.buf = self.shm.buf.cast("d")
+            for i in range(GARAGE_SLOTS): self.buf[i] = 0.0
+            self.proc = ctx.Process(target=garage_worker, args=(self.shm.name, seed, index), daemon=True); self.proc.start()
+        else:
+            # Inline: same simulation, stepped synchronously (headless runs and replays stay deterministic)
+            self.buf = memoryview(bytearray(GARAGE_SLOTS * 8)).cast("d"); self.sim = GarageSim(seed, index)
+    def control(self, dt, spec):
+        self.buf[G_CARS] = spec["cars"]; self.buf[G_SPEED] = spec["speed_level"]; self.buf[G_TARGET] += dt
+        if self.sim: self.sim.pump(self.buf)
+    def read(self):
+        # Lock-free seqlock read; keeps the previous snapshot if the shard is mid-publish
+        buf = self.buf
+        for _ in range(3):
+            seq = buf[G_SEQ]
+            if int(seq) % 2: continue
+            sim_time, laps, n = buf[G_TIME], int(buf[G_LAPS]), int(buf[G_N]); ts = buf[G_T:G_T + n].tolist()
+            if buf[G_SEQ] == seq: self.snapshot = (sim_time, laps, ts); break
+        return self.snapshot
+    def take_laps(self):
+        laps = self.snapshot[1]; new = laps - self.awarded; self.awarded = laps; return new
+    def close(self):
+        if self.proc:
+            self.buf[G_STOP] = 1; self.proc.join(timeout=1.0)
+            if self.proc.is_alive(): self.proc.terminate()
+        self.buf.release()
+        if self.shm: self.shm.close(); self.shm.unlink()
+
+class GaragePool:
+    """One shard per GameState garage; the frame loop only writes targets, reads snapshots and awards lap deltas."""
+    def __init__(self, seed, inline=False):
+        self.seed = seed; self.shards = []; self.owner = None; self.ctx = None; self._traits = {}
+        if not inline:
+            try: self.ctx = multiprocessing.get_context("spawn")
+            except Exception as e: print("Garage workers unavailable, simulating inline:", e)
+    def sync(self, gs):
+        if self.owner is not gs: self.close(); self.owner = gs   # new game / loaded save
+        while len(self.shards) < len(gs.garages):
+            try: shard = GarageShard(self.seed, len(self.shards), self.ctx)
+            except Exception as e:
+                print("Garage worker failed to start, simulating inline:", e); self.ctx = None; shard = GarageShard(self.seed, len(self.shards))
+            self.shards.append(shard)
+    def car_traits(self, index, k):
+        key = (index, k)
+        if key not in self._traits: self._traits[key] = garage_car_traits(self.seed, index, k)
+        return self._traits[key]
+    def step(self, dt, gs):
+        self.sync(gs); laps = 0
+        for shard, spec in zip(self.shards, gs.garages):
+            shard.control(dt, spec); shard.read(); laps += shard.take_laps()
+        gs.award_laps(laps)
+    def close(self):
+        for shard in self.shards: shard.close()
+        self.shards = []
 
 # ------------------------------
 # Blackjack
@@ -358,7 +828,7 @@ class Blackjack:
         self.gs = game_state; self.deck = []; self.player = []; self.dealer = []
         self.in_round = False; self.message = "Place your bet and DEAL."; self.bet = 50; self.bet_locked = 0
         self.shuffle_deck()
-    def shuffle_deck(self): self.deck = [(r, s) for s in SUITS for r in RANKS] * 4; random.shuffle(self.deck)
+    def shuffle_deck(self): self.deck = [(r, s) for s in SUITS for r in RANKS] * 4; RNG.cards.shuffle(self.deck)
     def draw_card(self):
         if not self.deck: self.shuffle_deck()
         return self.deck.pop()
@@ -367,25 +837,30 @@ class Blackjack:
         if not self.can_deal(): self.message = "Not enough gold or invalid bet."; return
         self.in_round = True; self.player = [self.draw_card(), self.draw_card()]; self.dealer = [self.draw_card(), self.draw_card()]
         self.bet_locked = int(self.bet); self.gs.gold -= self.bet_locked; self.message = "Hit or Stand."
+        TELEMETRY.emit("bj_deal", bet=self.bet_locked, player=hand_value(self.player))
         if hand_value(self.player)==21 or hand_value(self.dealer)==21: self.resolve_naturals()
     def resolve_naturals(self):
         pv = hand_value(self.player); dv = hand_value(self.dealer)
         if pv==21 and dv!=21: self.payout(2*self.bet_locked, "Blackjack! You win."); self.gs.bj_stats["games"]+=1; self.gs.bj_stats["wins"]+=1
         elif pv==21 and dv==21: self.payout(1*self.bet_locked, "Push. Bet returned."); self.gs.bj_stats["games"]+=1
-        elif dv==21 and pv!=21: self.message = "Dealer blackjack. You lose."; self.in_round=False; self.gs.bj_stats["games"]+=1
+        elif dv==21 and pv!=21: self.message = "Dealer blackjack. You lose."; self.in_round=False; self.gs.bj_stats["games"]+=1; self.result("dealer_blackjack")
     def hit(self):
         if not self.in_round: return
-        self.player.append(self.draw_card())
-        if hand_value(self.player) > 21: self.message = "Bust! You lose."; self.in_round = False; self.gs.bj_stats["games"]+=1
+        self.player.append(self.draw_card()); TELEMETRY.emit("bj_hit", player=hand_value(self.player))
+        if hand_value(self.player) > 21: self.message = "Bust! You lose."; self.in_round = False; self.gs.bj_stats["games"]+=1; self.result("bust")
     def stand(self):
         if not self.in_round: return
         while hand_value(self.dealer) < 17: self.dealer.append(self.draw_card())
-        dv = hand_value(self.dealer); pv = hand_value(self.player); self.gs.bj_stats["games"]+=1
+        dv = hand_value(self.dealer); pv = hand_value(self.player); self.gs.bj_stats["games"]+=1; TELEMETRY.emit("bj_stand", player=pv, dealer=dv)
         if dv > 21 or pv > dv: self.payout(2*self.bet_locked, "You win."); self.gs.bj_stats["wins"]+=1
         elif pv == dv: self.payout(1*self.bet_locked, "Push. Bet returned.")
-        else: self.message = "You lose."
+        else: self.message = "You lose."; self.result("loss")
         self.in_round = False
-    def payout(self, amount, msg): self.gs.gold += amount; self.gs.lifetime_gold_earned += amount; self.message = msg; self.in_round = False
+    def payout(self, amount, msg):
+        self.gs.gold += amount; self.gs.lifetime_gold_earned += amount; self.message = msg; self.in_round = False
+        self.result("push" if amount == self.bet_locked else "win", amount)
+    def result(self, outcome, paid=0):
+        TELEMETRY.emit("bj_result", outcome=outcome, bet=self.bet_locked, paid=paid, net=paid - self.bet_locked)
     def change_bet(self, d):
         if self.in_round: return
         self.bet = clamp(self.bet + d, 10, min(100000, int(self.gs.gold) + 10000))
@@ -439,16 +914,16 @@ class MainMenu(SceneBase):
             Button((cx - bw//2, y + 3*gap, bw, bh), "Exit", self.btn_font, onclick=self.exit_game, accent=RED),
         ]
     def start_game(self):
-        w, h = self.app.screen.get_size(); self.app.state = GameState(w, h); self.app.change_scene(IdleScene(self.app))
+        self.app.state = self.app.new_state(); self.app.change_scene(IdleScene(self.app))
     def load_game(self):
-        w, h = self.app.screen.get_size(); gs = GameState(w, h); ok, earned = gs.load(SAVE_FILE)
-        self.app.state = gs if ok else GameState(w, h)
+        gs = self.app.new_state(); ok, earned = gs.load()
+        self.app.state = gs if ok else self.app.new_state()
         self.app.last_load_message = f"Loaded. Offline earned: {int(earned)}." if ok else "No save found. Starting new."
         self.app.change_scene(IdleScene(self.app))
     def go_options(self): self.app.change_scene(OptionsScene(self.app))
     def exit_game(self): pygame.event.post(pygame.event.Event(pygame.QUIT))
     def update(self, dt, events):
-        keys = pygame.key.get_pressed(); mouse = pygame.mouse.get_pos()
+        keys = self.app.keys; mouse = self.app.mouse_pos
         for e in events:
             if e.type == pygame.VIDEORESIZE: self.relayout()
         for b in self.buttons:
@@ -491,7 +966,7 @@ class OptionsScene(SceneBase):
         self.buttons = [self.btn_full, self.btn_res_1920, self.btn_res_1280, self.btn_autosave, self.btn_particles, self.btn_fps, self.btn_back]
     def go_back(self): self.app.change_scene(MainMenu(self.app))
     def update(self, dt, events):
-        keys = pygame.key.get_pressed(); mouse = pygame.mouse.get_pos()
+        keys = self.app.keys; mouse = self.app.mouse_pos
         for e in events:
             if e.type == pygame.VIDEORESIZE: self.relayout()
         # Dynamic labels
@@ -522,7 +997,9 @@ class IdleScene(SceneBase):
         self.particles = []; self.scroll_offset = 0.0; self.buttons = []; self.button_bases = {}
         self.click_fx = [] 
         self.show_stats = False; self.show_achievements = True
-        self._ach_rect = pygame.Rect(24, 24, 340, 180); self._stats_rect = pygame.Rect(24, 860, 360, 196)
+        self._ach_rect = pygame.Rect(24, 24, 340, 180); self._stats_rect = pygame.Rect(24, 716, 360, 340)
+        self.chart_tier = "sec"; self._chart_surf = None; self._chart_key = None
+        self._track_pts = {}; self._sprites = {}   # see track_points / trail_dot / glow
         self.offline_note = self.app.last_load_message or ""; self.app.last_load_message = ""
         self.last_canvas_size = self.app.screen.get_size(); self.relayout()
     def relayout(self):
@@ -538,13 +1015,21 @@ class IdleScene(SceneBase):
         self.btn_auto    = Button((px, py + 3*gap, bw, bh), "", self.font, onclick=self.up_auto, key=pygame.K_4, tooltip="4: Auto-Clicker.", accent=GREEN)
         self.btn_mult    = Button((px, py + 4*gap, bw, bh), "", self.font, onclick=self.up_mult, key=pygame.K_5, tooltip="5: x1.5/level + 10% per Ads lvl", accent=PURPLE)
         self.btn_offline = Button((px, py + 5*gap, bw, bh), "", self.font, onclick=self.up_offline, key=pygame.K_6, tooltip="6: Offline earnings.", accent=ORANGE)
-        self.btn_track   = Button((px, py + 6*gap, bw, bh), "Change Track (T)", self.font, onclick=self.change_track, key=pygame.K_t, tooltip="Cycle tracks.", accent=CYAN)
-        self.btn_bj      = Button((px, py + 7*gap, bw, bh), "BLACKJACK (B)", self.font, onclick=self.go_blackjack, key=pygame.K_b, tooltip="Unlocks at 1000 gold.", accent=WHITE)
-        self.btn_stats   = Button((px, py + 8*gap, bw, bh), "Stats Overlay (V)", self.font, onclick=self.toggle_stats, key=pygame.K_v, tooltip="Show/hide statistics overlay.", accent=WHITE)
-        self.btn_prest   = Button((px, py + 9*gap, bw, bh), "PRESTIGE (P)", self.font, onclick=self.do_prestige, key=pygame.K_p, tooltip="1M+ gold.", accent=RED)
-        self.btn_save    = Button((px, py + 10*gap, bw, bh), "SAVE (S)", self.font, onclick=self.manual_save, key=pygame.K_s, tooltip="Force save.", accent=WHITE)
-        self.btn_menu    = Button((px, py + 11*gap, bw, bh), "MAIN MENU (Esc)", self.font, onclick=self.go_main_menu, key=pygame.K_ESCAPE, tooltip="Go back to the main menu", accent=RED)
-        self.buttons = [self.btn_buy_car, self.btn_speed, self.btn_payout, self.btn_auto, self.btn_mult, self.btn_offline, self.btn_track, self.btn_bj, self.btn_stats, self.btn_prest, self.btn_save, self.btn_menu]
+        self.btn_autobuy = Button((px, py + 6*gap, bw, bh), "", self.font, onclick=self.toggle_auto_buy, tooltip="A: Auto-buy the best gold/sec per cost upgrade.", accent=GREEN)
+        # Garages share one row, shown only once unlocked, so Save/Menu (and their hotkeys) stay on screen at 1080p
+        self.garage_row = self.app.state.garages_unlocked(); g = 1 if self.garage_row else 0; tw = (bw - 16) // 3
+        self.btn_garage  = Button((px, py + 7*gap, tw, bh), "", self.small_font, onclick=self.open_garage, key=pygame.K_g, tooltip="G: Open another track.", accent=ORANGE)
+        self.btn_gcar    = Button((px + tw + 8, py + 7*gap, tw, bh), "", self.small_font, onclick=self.garage_car, key=pygame.K_f, tooltip="F: Add a car to the smallest garage fleet.", accent=ORANGE)
+        self.btn_gtune   = Button((px + 2*(tw + 8), py + 7*gap, bw - 2*(tw + 8), bh), "", self.small_font, onclick=self.garage_tune, key=pygame.K_u, tooltip="U: Speed up the slowest garage.", accent=ORANGE)
+        self.btn_track   = Button((px, py + (7+g)*gap, bw, bh), "Change Track (T)", self.font, onclick=self.change_track, key=pygame.K_t, tooltip="Cycle tracks.", accent=CYAN)
+        self.btn_bj      = Button((px, py + (8+g)*gap, bw, bh), "BLACKJACK (B)", self.font, onclick=self.go_blackjack, key=pygame.K_b, tooltip="Unlocks at 1000 gold.", accent=WHITE)
+        self.btn_stats   = Button((px, py + (9+g)*gap, bw, bh), "Stats Overlay (V)", self.font, onclick=self.toggle_stats, key=pygame.K_v, tooltip="Show/hide statistics overlay.", accent=WHITE)
+        self.btn_prest   = Button((px, py + (10+g)*gap, bw, bh), "PRESTIGE (P)", self.font, onclick=self.do_prestige, key=pygame.K_p, tooltip="1M+ gold.", accent=RED)
+        self.btn_save    = Button((px, py + (11+g)*gap, bw, bh), "SAVE (S)", self.font, onclick=self.manual_save, key=pygame.K_s, tooltip="Force save.", accent=WHITE)
+        self.btn_menu    = Button((px, py + (12+g)*gap, bw, bh), "MAIN MENU (Esc)", self.font, onclick=self.go_main_menu, key=pygame.K_ESCAPE, tooltip="Go back to the main menu", accent=RED)
+        self.buttons = [self.btn_buy_car, self.btn_speed, self.btn_payout, self.btn_auto, self.btn_mult, self.btn_offline, self.btn_autobuy]
+        if self.garage_row: self.buttons += [self.btn_garage, self.btn_gcar, self.btn_gtune]
+        self.buttons += [self.btn_track, self.btn_bj, self.btn_stats, self.btn_prest, self.btn_save, self.btn_menu]
         self.button_bases = {b: b.rect.copy() for b in self.buttons}
     # Callbacks
     def buy_car(self): self.app.state.add_car()
@@ -554,6 +1039,10 @@ class IdleScene(SceneBase):
     def up_mult(self): self.app.state.upgrade_multiplier()
     def up_offline(self): self.app.state.upgrade_offline()
     def toggle_stats(self): self.show_stats = not self.show_stats
+    def toggle_auto_buy(self): self.app.state.auto_buy = not self.app.state.auto_buy
+    def open_garage(self): self.app.state.open_garage()
+    def garage_car(self): self.app.state.add_garage_car()
+    def garage_tune(self): self.app.state.tune_garage()
     def change_track(self):
         self.app.state.track_type = (self.app.state.track_type + 1) % 4
         self.app.state.notify(["Circle", "Figure-8", "Oval", "Complex"][self.app.state.track_type] + " track selected 🛣️")
@@ -572,6 +1061,7 @@ class IdleScene(SceneBase):
             if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
                 if self.show_achievements and pygame.Rect(self._ach_rect.right - 28, self._ach_rect.top + 8, 20, 20).collidepoint(e.pos): self.show_achievements = False
                 if self.show_stats and pygame.Rect(self._stats_rect.right - 28, self._stats_rect.top + 8, 20, 20).collidepoint(e.pos): self.show_stats = False
+                elif self.show_stats and self.chart_rect().collidepoint(e.pos): self.cycle_chart_tier()
     def click_to_boost(self, pos):
         w, h = self.app.screen.get_size(); panel_w = panel_w_for(w)
         if pos[0] >= w - panel_w: return
@@ -591,18 +1081,20 @@ class IdleScene(SceneBase):
         self.center = center_for(w, h, panel_w); self.radius = radius_for(w, h, panel_w)
         if self.last_canvas_size != (w, h):
             self.relayout(); self.app.state.re_seed_stars(w, h); self.last_canvas_size = (w, h)
-        keys = pygame.key.get_pressed(); mouse = pygame.mouse.get_pos()
+        elif self.garage_row != self.app.state.garages_unlocked(): self.relayout()   # first prestige / loaded save
+        keys = self.app.keys; mouse = self.app.mouse_pos
         for e in events:
             if e.type == pygame.VIDEORESIZE: self.relayout()
             if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1: self.click_to_boost(e.pos)
+            if e.type == pygame.KEYDOWN and e.key == pygame.K_a: self.toggle_auto_buy()   # a switch: once per press, not per held frame
         # Passive income
-        gsec = self.app.state.auto_gold_per_sec(); self.app.state.gold += gsec * dt; self.app.state.lifetime_gold_earned += gsec * dt
+        gsec = self.app.state.auto_gold_per_sec(); self.app.state.gold += gsec * dt; self.app.state.lifetime_gold_earned += gsec * dt; self.app.state.idle_gold_earned += gsec * dt
         # Cars
         ang_speed = self.app.state.ang_speed()
         for car in self.app.state.cars_list:
             if car["cooldown"] > 0: car["cooldown"] -= dt
             if car["boost"] > 0: car["boost"] -= dt
-            elif car["cooldown"] <= 0 and random.random() < 0.4*dt: car["boost"] = random.uniform(0.8, 1.4); car["cooldown"] = random.uniform(2.5, 5.5)
+            elif car["cooldown"] <= 0 and RNG.boost.random() < 0.4*dt: car["boost"] = RNG.boost.uniform(0.8, 1.4); car["cooldown"] = RNG.boost.uniform(2.5, 5.5)
             boost_factor = 1.0 + (0.8 if car["boost"] > 0 else 0.0)
             prev_t = car["t"]; car["t"] = (car["t"] + ang_speed * car["var"] * boost_factor * dt) % (2*math.pi)
             x, y = track_pos(self.app.state.track_type, car["t"], self.radius, self.center)
@@ -612,13 +1104,21 @@ class IdleScene(SceneBase):
                 if self.app.state.enable_particles:
                     for _ in range(10): self.particles.append(Particle(x, y, color=YELLOW, speed=(100,200), life=(0.3,0.6), size=(2,4)))
         if self.app.state.enable_particles: self.particles = [p for p in self.particles if p.update(dt)]
-        # Labels & enablement
+        # Auto-buyer
         gs = self.app.state
-        self.btn_buy_car.text = f"Buy Car ({fmt_num(gs.get_car_cost())})"; self.btn_speed.text = f"Upgrade Speed ({fmt_num(gs.get_speed_cost())})"
-        self.btn_payout.text = f"Track Ads ({fmt_num(gs.get_payout_cost())})"; self.btn_auto.text = f"Auto-Clicker Lv{gs.autoclicker_level} ({fmt_num(gs.get_auto_cost())})"
-        self.btn_mult.text = f"Gold Mult ×1.5^{gs.gold_mult_level} ({fmt_num(gs.get_mult_cost())})"; self.btn_offline.text = f"Offline Boost Lv{gs.offline_level} ({fmt_num(gs.get_offline_cost())})"
+        if gs.auto_buy: gs.autobuyer.tick()
+        # Garages (simulated off-thread; only lap deltas come back)
+        self.app.garage_pool.step(dt, gs)
+        # Labels & enablement
+        labels = gs.upgrade_labels()   # rebuilt only when gs.version changes
+        self.btn_buy_car.text = labels["add_car"]; self.btn_speed.text = labels["upgrade_speed"]; self.btn_payout.text = labels["upgrade_payout"]
+        self.btn_auto.text = labels["upgrade_auto"]; self.btn_mult.text = labels["upgrade_multiplier"]; self.btn_offline.text = labels["upgrade_offline"]
         self.btn_buy_car.enabled = gs.gold >= gs.get_car_cost(); self.btn_speed.enabled = gs.gold >= gs.get_speed_cost(); self.btn_payout.enabled = gs.gold >= gs.get_payout_cost()
         self.btn_auto.enabled = gs.gold >= gs.get_auto_cost(); self.btn_mult.enabled = gs.gold >= gs.get_mult_cost(); self.btn_offline.enabled = gs.gold >= gs.get_offline_cost()
+        self.btn_autobuy.text = f"Auto-Buy: {'ON' if gs.auto_buy else 'OFF'} (A)"
+        self.btn_garage.text = labels["open_garage"]; self.btn_gcar.text = labels["add_garage_car"]; self.btn_gtune.text = labels["tune_garage"]
+        self.btn_garage.enabled = len(gs.garages) < MAX_GARAGES and gs.gold >= gs.get_garage_cost()
+        self.btn_gcar.enabled = bool(gs.garages) and gs.gold >= gs.get_garage_car_cost(); self.btn_gtune.enabled = bool(gs.garages) and gs.gold >= gs.get_garage_tune_cost()
         self.btn_bj.enabled = gs.blackjack_unlocked; self.btn_prest.enabled = gs.prestige_available()
         # Scroll
         base_tops = [r.top for r in self.button_bases.values()] if self.button_bases else [0]
@@ -642,28 +1142,82 @@ class IdleScene(SceneBase):
                 self.click_fx.remove(fx)       
                  # Meta
 
-        self.app.state.update_gps(); self.app.state.check_achievements(); self.app.state.tick_autosave(dt); self.app.state.update_notifications(dt); self.update_fade(dt)
-        self._stats_rect = pygame.Rect(24, h - 220, 360, 196); self.handle_close_clicks(events)
+        self.app.state.update_history(dt); self.app.state.check_achievements(); self.app.state.tick_autosave(dt); self.app.state.update_notifications(dt); self.update_fade(dt)
+        self._stats_rect = pygame.Rect(24, h - 364, 360, 340); self.handle_close_clicks(events)
+    GARAGE_R = 64
+    def garage_center(self, i, track_w, h): return (track_w - 100 - i * 180, h - 100)
+    def draw_garages(self, surface, track_w, h):
+        # Mini tracks along the bottom-right of the track area, drawn from the shards' latest snapshots
+        pool = self.app.garage_pool; r = self.GARAGE_R
+        for i, (shard, spec) in enumerate(zip(pool.shards, self.app.state.garages)):
+            center = self.garage_center(i, track_w, h)
+            pygame.draw.aalines(surface, (40, 40, 40), True, self.track_points(spec["track_type"], r, center, 60))
+            for j, t in enumerate(shard.snapshot[2]):
+                traits = pool.car_traits(i, j); x, y = track_pos(spec["track_type"], t, r, center)
+                pygame.draw.circle(surface, traits["col"], (int(x), int(y)), traits["size"] // 2 + 1)
+            draw_text(surface, f"G{i+1} · {spec['cars']} cars · Spd {spec['speed_level']}", self.small_font, DARK_GREY, (center[0], center[1] + r + 14), center=True)
+    def track_points(self, track_type, radius, center, n):
+        # Track outlines only change with the track type or window size
+        key = (track_type, radius, center, n); pts = self._track_pts.get(key)
+        if pts is None:
+            if len(self._track_pts) > 16: self._track_pts.clear()
+            pts = self._track_pts[key] = [tuple(map(int, track_pos(track_type, (i / n) * 2*math.pi, radius, center))) for i in range(n)]
+        return pts
+    def trail_dot(self, col, a):
+        # 8x8 translucent trail squares, one per (car colour, alpha step) instead of one per dot per frame
+        key = (col, a); dot = self._sprites.get(key)
+        if dot is None:
+            if len(self._sprites) > 4096: self._sprites.clear()
+            dot = self._sprites[key] = pygame.Surface((8,8), pygame.SRCALPHA); dot.fill((col[0], col[1], col[2], a))
+        return dot
+    def glow(self, alpha):
+        key = ("glow", alpha); glow = self._sprites.get(key)
+        if glow is None:
+            glow = self._sprites[key] = pygame.Surface((50,50), pygame.SRCALPHA); pygame.draw.circle(glow, (255,255,255,alpha), (25,25), 20)
+        return glow
+    def render_toast(self, text):
+        surf = pygame.Surface((520, 40), pygame.SRCALPHA)
+        pygame.draw.rect(surf, (30,30,30,180), pygame.Rect(0,0,520,40), border_radius=10)
+        pygame.draw.rect(surf, (255,255,255,220), pygame.Rect(0,0,520,40), 1, border_radius=10)
+        surf.blit(self.small_font.render(text, True, WHITE), (14, 10))
+        return surf
+    def chart_rect(self): return pygame.Rect(self._stats_rect.x + 12, self._stats_rect.bottom - 132, self._stats_rect.w - 24, 120)
+    def cycle_chart_tier(self):
+        names = [t.name for t in self.app.state.history.tiers]
+        self.chart_tier = names[(names.index(self.chart_tier) + 1) % len(names)]
+    def draw_history_chart(self, surface, rect):
+        # Cached: only re-rendered when a history bucket closes, the tier changes or the panel resizes
+        hist = self.app.state.history; key = (hist.version, self.chart_tier, rect.size)
+        if self._chart_key != key:
+            self._chart_key = key; surf = pygame.Surface(rect.size, pygame.SRCALPHA)
+            pygame.draw.rect(surf, (24,24,24), surf.get_rect(), border_radius=8)
+            vals = hist.series(self.chart_tier, "gps"); top = max(vals) if vals else 0.0
+            tier = hist.by_name[self.chart_tier]; span = tier.rows.maxlen * tier.seconds
+            label = {1: "s", 60: "min", 3600: "h"}[tier.seconds]
+            draw_text(surf, f"Gold/sec · last {span // tier.seconds}{label} (click)", self.small_font, GREY, (8, 4))
+            draw_text(surf, f"max {fmt_num(top)}", self.small_font, DARK_GREY, (8, rect.h - 22))
+            if len(vals) > 1 and top > 0:
+                plot = pygame.Rect(4, 28, rect.w - 8, rect.h - 52); step = plot.w / (tier.rows.maxlen - 1)
+                x0 = plot.right - step * (len(vals) - 1)
+                pts = [(x0 + i * step, plot.bottom - plot.h * (v / top)) for i, v in enumerate(vals)]
+                pygame.draw.lines(surf, GREEN, False, pts, 2)
+            self._chart_surf = surf
+        surface.blit(self._chart_surf, rect.topleft)
     def draw(self, surface):
         w, h = surface.get_size(); panel_w = panel_w_for(w); self.center = center_for(w, h, panel_w); self.radius = radius_for(w, h, panel_w)
         surface.fill(BLACK)
         for s in self.app.state.stars: s.draw(surface)
         # Track
-        col = (40, 40, 40); pts = []
-        for i in range(200):
-            t = (i / 200) * 2*math.pi; x, y = track_pos(self.app.state.track_type, t, self.radius, self.center); pts.append((int(x), int(y)))
-        if len(pts) > 1: pygame.draw.aalines(surface, col, True, pts)
+        pygame.draw.aalines(surface, (40, 40, 40), True, self.track_points(self.app.state.track_type, self.radius, self.center, 200))
         # Cars & trails
         for car in self.app.state.cars_list:
             if car["trail"]:
-                for i, (tx, ty) in enumerate(car["trail"]):
-                    a = int(20 + 235 * (i / len(car["trail"]))**1.2); surf = pygame.Surface((8,8), pygame.SRCALPHA)
-                    surf.fill((car["col"][0], car["col"][1], car["col"][2], a//5)); surface.blit(surf, (int(tx)-4, int(ty)-4))
+                n = len(car["trail"])
+                surface.blits([(self.trail_dot(car["col"], int(20 + 235 * (i / n)**1.2) // 5), (int(tx)-4, int(ty)-4)) for i, (tx, ty) in enumerate(car["trail"])], False)
             x, y = track_pos(self.app.state.track_type, car["t"], self.radius, self.center)
-            if car["boost"] > 0:
-                glow = pygame.Surface((50,50), pygame.SRCALPHA); alpha = clamp(int(120 * (car["boost"])), 40, 160)
-                pygame.draw.circle(glow, (255,255,255,alpha), (25,25), 20); surface.blit(glow, (int(x)-25, int(y)-25))
+            if car["boost"] > 0: surface.blit(self.glow(clamp(int(120 * (car["boost"])), 40, 160)), (int(x)-25, int(y)-25))
             pygame.draw.circle(surface, car["col"], (int(x), int(y)), car["size"])
+        self.draw_garages(surface, w - panel_w, h)
         if self.app.state.enable_particles:
             for p in self.particles: p.draw(surface)
         # Right panel
@@ -691,7 +1245,7 @@ class IdleScene(SceneBase):
         self.buttons_view = pygame.Rect(panel_x + 20, 150, panel_w - 40, h - 170)
         surface.set_clip(self.buttons_view)
         for b in self.buttons:
-            if b.visible: b.draw(surface); b.draw_tooltip(surface, self.small_font, pygame.mouse.get_pos())
+            if b.visible: b.draw(surface); b.draw_tooltip(surface, self.small_font, self.app.mouse_pos)
         surface.set_clip(None)
         # Achievements overlay
         if self.show_achievements:
@@ -700,13 +1254,14 @@ class IdleScene(SceneBase):
             names = [name for name, st in self.app.state.achievements.items() if st.get("unlocked")]; yy = ach_panel.y + 44
             for name in sorted(names)[:6]: draw_text(surface, f"• {name}", self.small_font, GREY, (ach_panel.x + 16, yy)); yy += 22
             if len(names) > 6: draw_text(surface, f"+{len(names)-6} more...", self.small_font, GREY, (ach_panel.x + 16, yy))
-            hover = pygame.Rect(ach_panel.right - 28, ach_panel.top + 8, 20, 20).collidepoint(pygame.mouse.get_pos()); draw_close(surface, ach_panel, hover=hover)
+            hover = pygame.Rect(ach_panel.right - 28, ach_panel.top + 8, 20, 20).collidepoint(self.app.mouse_pos); draw_close(surface, ach_panel, hover=hover)
         # Stats overlay
         if self.show_stats:
             stats_panel = self._stats_rect; pygame.draw.rect(surface, (16,16,16), stats_panel, border_radius=12); pygame.draw.rect(surface, WHITE, stats_panel, 1, border_radius=12)
             draw_text(surface, "Statistics", self.font, WHITE, (stats_panel.x + 12, stats_panel.y + 8))
             lines = [
-                f"Gold/Revolution: {fmt_num(self.app.state.gold_per_all_cars_rev())}"
+                f"Gold/Revolution: {fmt_num(self.app.state.gold_per_all_cars_rev())}",
+                f"Gold/sec: {fmt_num(self.app.state.gold_per_sec())}",
                 f"Laps: {fmt_num(self.app.state.laps_total)}",
                 f"Auto/sec: {fmt_num(self.app.state.auto_gold_per_sec())}",
                 f"Lifetime: {fmt_num(self.app.state.lifetime_gold_earned)}",
@@ -715,17 +1270,16 @@ class IdleScene(SceneBase):
             ]
             yy = stats_panel.y + 44
             for ln in lines: draw_text(surface, ln, self.small_font, GREY, (stats_panel.x + 16, yy)); yy += 22
-            hover = pygame.Rect(stats_panel.right - 28, stats_panel.top + 8, 20, 20).collidepoint(pygame.mouse.get_pos()); draw_close(surface, stats_panel, hover=hover)
+            self.draw_history_chart(surface, self.chart_rect())
+            hover = pygame.Rect(stats_panel.right - 28, stats_panel.top + 8, 20, 20).collidepoint(self.app.mouse_pos); draw_close(surface, stats_panel, hover=hover)
         # Notifications
         base_y = 90
-        for i, n in enumerate(self.app.state.notifications):
-            alpha = 1.0
-            if n["t"] > n["dur"] - 0.5: alpha = clamp((n["dur"] - n["t"]) / 0.5, 0.0, 1.0)
-            surf = pygame.Surface((520, 40), pygame.SRCALPHA); a = int(180 * alpha)
-            pygame.draw.rect(surf, (30,30,30,a), pygame.Rect(0,0,520,40), border_radius=10)
-            pygame.draw.rect(surf, (255,255,255,int(220*alpha)), pygame.Rect(0,0,520,40), 1, border_radius=10)
-            txt = self.small_font.render(n["text"], True, (255,255,255,int(255*alpha))); surf.blit(txt, (14, 10))
-            rect = surf.get_rect(center=(w//2 - panel_w//2, base_y + i*46)); surface.blit(surf, rect.topleft)
+        toasts = self.app.state.toasts
+        for i, n in enumerate(toasts.visible()):
+            # Rendered once per message/count change; fading is just the surface alpha
+            if n["surf"] is None: n["surf"] = self.render_toast(toasts.label(n))
+            n["surf"].set_alpha(int(255 * toasts.alpha(n)))
+            rect = n["surf"].get_rect(center=(w//2 - panel_w//2, base_y + i*46)); surface.blit(n["surf"], rect.topleft)
         draw_text(surface, "Scroll: Mouse Wheel / PgUp/PgDn", self.small_font, DARK_GREY, (panel_x + 20, h - 22)); self.draw_fade(surface)
 
 class BlackjackScene(SceneBase):
@@ -753,7 +1307,7 @@ class BlackjackScene(SceneBase):
     def do_stand(self): self.bj.stand()
     def go_back(self): self.app.change_scene(IdleScene(self.app))
     def update(self, dt, events):
-        keys = pygame.key.get_pressed(); mouse = pygame.mouse.get_pos()
+        keys = self.app.keys; mouse = self.app.mouse_pos
         for e in events:
             if e.type == pygame.VIDEORESIZE: self.relayout(); self._bjstats_rect = pygame.Rect(24, self.app.screen.get_height() - 200, 300, 160)
             if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1 and self.show_stats:
@@ -782,38 +1336,233 @@ class BlackjackScene(SceneBase):
         draw_text(surface, "Player", self.font, GREY, (w//2, 300), center=True); self.draw_hand(surface, self.bj.player, w//2, 330, hide=False)
         if self.bj.player: draw_text(surface, f"({hand_value(self.bj.player)})", self.small_font, GREY, (w//2, 430), center=True)
         draw_text(surface, self.bj.message, self.font, WHITE, (w//2, 468), center=True); draw_text(surface, f"Bet: {fmt_num(self.bj.bet)}", self.font, WHITE, (w//2, h - 200), center=True)
-        mouse = pygame.mouse.get_pos()
+        mouse = self.app.mouse_pos
         for b in self.buttons: b.draw(surface); b.draw_tooltip(surface, self.small_font, mouse)
         if self.show_stats:
             stats = self.app.state.bj_stats; games = max(1, int(stats.get("games", 0))); wins = int(stats.get("wins", 0)); winrate = 100.0 * wins / games if games > 0 else 0.0
             box = self._bjstats_rect; pygame.draw.rect(surface, (16,16,16), box, border_radius=12); pygame.draw.rect(surface, WHITE, box, 1, border_radius=12)
             draw_text(surface, "BJ Stats", self.font, WHITE, (box.x + 12, box.y + 8))
             draw_text(surface, f"Games: {games}", self.small_font, GREY, (box.x + 16, box.y + 50)); draw_text(surface, f"Wins: {wins}", self.small_font, GREY, (box.x + 16, box.y + 74)); draw_text(surface, f"Win rate: {winrate:.1f}%", self.small_font, GREY, (box.x + 16, box.y + 98))
-            hover = pygame.Rect(box.right - 28, box.top + 8, 20, 20).collidepoint(pygame.mouse.get_pos()); draw_close(surface, box, hover=hover)
+            hover = pygame.Rect(box.right - 28, box.top + 8, 20, 20).collidepoint(self.app.mouse_pos); draw_close(surface, box, hover=hover)
         self.draw_fade(surface)
 
+# ------------------------------
+# Input recording & replay
+# ------------------------------
+# Polled hotkeys (Button.key) -- recorded per frame since buttons fire while held
+HOTKEYS = (pygame.K_RETURN, pygame.K_ESCAPE, pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5, pygame.K_6,
+           pygame.K_g, pygame.K_f, pygame.K_u, pygame.K_t, pygame.K_b, pygame.K_v, pygame.K_p, pygame.K_s, pygame.K_h, pygame.K_j)
+REPLAY_EVENT_TYPES = (pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP,
+                      pygame.MOUSEWHEEL, pygame.VIDEORESIZE)
+REPLAY_VERSION = 1
+
+def state_digest(gs):
+    d = gs.to_dict(); d.pop("last_save_ts", None)
+    d["cars_t"] = [round(c["t"], 9) for c in gs.cars_list]
+    return hashlib.sha1(json.dumps(d, sort_keys=True).encode("utf-8")).hexdigest()
+
+class ReplayKeys:
+    # Stand-in for pygame.key.get_pressed() during replay
+    def __init__(self, down=()): self.down = frozenset(down)
+    def __getitem__(self, key): return key in self.down
+
+def event_to_record(e):
+    attrs = {}
+    for k, v in e.dict.items():
+        if isinstance(v, tuple): v = list(v)
+        if isinstance(v, (bool, int, float, str, list)): attrs[k] = v
+    return [e.type, attrs]
+
+def event_from_record(rec):
+    etype, attrs = rec
+    return pygame.event.Event(etype, {k: tuple(v) if isinstance(v, list) else v for k, v in attrs.items()})
+
+class Recorder:
+    """Writes seed, starting save, per-frame dt/events/polled input and a final digest as gzipped JSON lines."""
+    def __init__(self, path, app):
+        self.path = path; self.frames = 0
+        self._mouse = None; self._keys = None; self._size = None; self._ts = None
+        save = None
+        if os.path.exists(app.save_path):
+            with open(app.save_path, "r", encoding="utf-8") as f: save = json.load(f)
+        self.f = gzip.open(path, "wt", encoding="utf-8")
+        self._write({"v": REPLAY_VERSION, "seed": RNG.seed, "size": list(app.screen.get_size()), "save": save})
+    def _write(self, obj): self.f.write(json.dumps(obj, separators=(",", ":")) + "\n")
+    def frame(self, dt, raw_events, mouse, keys, size):
+        rec = {"dt": dt}
+        ev = [event_to_record(e) for e in raw_events if e.type in REPLAY_EVENT_TYPES]
+        if ev: rec["e"] = ev
+        mouse = list(mouse); down = [k for k in HOTKEYS if keys[k]]; size = list(size); ts = now_ts()
+        if mouse != self._mouse: rec["m"] = self._mouse = mouse
+        if down != self._keys: rec["k"] = self._keys = down
+        if size != self._size: rec["s"] = self._size = size
+        if ts != self._ts: rec["ts"] = self._ts = ts
+        self._write(rec); self.frames += 1
+    def close(self, gs):
+        self._write({"end": state_digest(gs), "frames": self.frames}); self.f.close()
+        print(f"Recorded {self.frames} frames to {self.path}")
+
+class Replayer:
+    """Feeds a recording back through App.run at full speed and checks the final state digest."""
+    def __init__(self, path):
+        self.path = path
+        with gzip.open(path, "rt", encoding="utf-8") as f: lines = [json.loads(ln) for ln in f if ln.strip()]
+        self.header = lines[0]
+        if self.header.get("v") != REPLAY_VERSION: raise ValueError(f"Unsupported replay version: {self.header.get('v')}")
+        self.footer = lines[-1] if len(lines) > 1 and "end" in lines[-1] else None
+        self.frames = lines[1:-1] if self.footer else lines[1:]
+        self.pos = 0; self.ts = time.time(); self.started = None; self.scratch = None
+        self.mouse = (0, 0); self.keys = ReplayKeys(); self.size = tuple(self.header["size"])
+    def prepare_save(self):
+        # Replays never touch the player's save: seed a scratch file with the recorded starting save
+        # (removed in finish(), or at exit if the replay never gets there)
+        self.scratch = tempfile.TemporaryDirectory(prefix="idle_replay_"); path = os.path.join(self.scratch.name, SAVE_FILE)
+        if self.header.get("save") is not None:
+            with open(path, "w", encoding="utf-8") as f: json.dump(self.header["save"], f)
+        return path
+    def poll(self):
+        if self.pos >= len(self.frames): return None
+        if self.started is None: self.started = time.perf_counter()
+        rec = self.frames[self.pos]; self.pos += 1
+        if "m" in rec: self.mouse = tuple(rec["m"])
+        if "k" in rec: self.keys = ReplayKeys(rec["k"])
+        if "s" in rec: self.size = tuple(rec["s"])
+        if "ts" in rec: self.ts = rec["ts"]
+        return rec["dt"], [event_from_record(r) for r in rec.get("e", [])]
+    def finish(self, gs):
+        wall = max(1e-9, time.perf_counter() - (self.started or time.perf_counter()))
+        if self.scratch: self.scratch.cleanup(); self.scratch = None
+        print(f"Replayed {self.pos}/{len(self.frames)} frames in {wall:.3f}s ({self.pos / wall:.0f} fps)")
+        if not self.footer: print("Recording has no end digest; cannot verify final state."); return True
+        ok = self.pos == len(self.frames) and state_digest(gs) == self.footer["end"]
+        print("Final state MATCHES recording." if ok else "Final state DIFFERS from recording!")
+        return ok
+
+# ------------------------------
+# Frame capture (shared-memory buffers, encoded in worker processes)
+# ------------------------------
+CAPTURE_DIR = "capture"; CAPTURE_FORMATS = ("png", "raw")
+
+def capture_worker(directory, fmt, tasks, done):
+    # PNG encoding holds the GIL, so it runs here rather than on a thread next to the frame loop
+    shms = {}; stream = None; stream_size = None; segment = 0
+    try:
+        while True:
+            task = tasks.get()
+            if task is None: break
+            slot, name, n, size = task
+            if slot not in shms or shms[slot].name != name:
+                if slot in shms: shms[slot].close()
+                shms[slot] = shared_memory.SharedMemory(name=name)
+            data = shms[slot].buf[:size[0] * size[1] * 4]
+            try:
+                if fmt == "png":
+                    pygame.image.save(pygame.image.frombuffer(data, size, "BGRA"), os.path.join(directory, f"frame_{n:06d}.png"))
+                else:
+                    # One stream per window size, frames appended in order (single worker)
+                    if size != stream_size:
+                        if stream: stream.close()
+                        segment += 1; stream_size = size
+                        stream = open(os.path.join(directory, f"stream_{segment:02d}_{size[0]}x{size[1]}.bgra"), "wb")
+                    stream.write(data)
+            except (OSError, pygame.error) as e:
+                print("Capture write failed:", e)
+            finally:
+                data.release()
+            done.put(slot)
+    finally:
+        if stream: stream.close()
+        for shm in shms.values(): shm.close()
+
+class FrameCapture:
+    """grab() blits the drawn frame into one of a few reused shared-memory buffers (a couple of ms on the
+    main thread); worker processes encode them to numbered PNGs or a raw BGRA stream. When every buffer is
+    still queued the frame is dropped and counted, unless block is set (replays, where nobody is waiting)."""
+    def __init__(self, directory, fmt="png", buffers=6, workers=None, block=False):
+        os.makedirs(directory, exist_ok=True)
+        self.dir = directory; self.fmt = fmt; self.block = block
+        self.frames = 0; self.written = 0; self.dropped = 0
+        self.shms = [None] * buffers; self.views = [None] * buffers; self.free = list(range(buffers))
+        ctx = multiprocessing.get_context("spawn"); self.tasks = ctx.Queue(); self.done = ctx.Queue()
+        if workers is None: workers = clamp((os.cpu_count() or 2) - 1, 1, 4)
+        self.procs = [ctx.Process(target=capture_worker, args=(directory, fmt, self.tasks, self.done), daemon=True)
+                      for _ in range(1 if fmt == "raw" else workers)]
+        for p in self.procs: p.start()
+    def reclaim(self, wait=False):
+        if wait and not self.free:
+            try: self.free.append(self.done.get(timeout=10.0)); self.written += 1
+            except queue.Empty: pass
+        while True:
+            try: self.free.append(self.done.get_nowait())
+            except queue.Empty: return
+            self.written += 1
+    def grab(self, surface):
+        self.frames += 1; self.reclaim(self.block)
+        if not self.free: self.dropped += 1; return False
+        slot = self.free.pop(); size = surface.get_size()
+        view = self.views[slot]
+        if view is None or view.get_size() != size:
+            need = size[0] * size[1] * 4; shm = self.shms[slot]; self.views[slot] = view = None
+            if shm is None or shm.size < need:
+                if shm: shm.close(); shm.unlink()
+                shm = self.shms[slot] = shared_memory.SharedMemory(create=True, size=need)
+            view = self.views[slot] = pygame.image.frombuffer(shm.buf[:need], size, "BGRA")
+        view.blit(surface, (0, 0))
+        self.tasks.put((slot, self.shms[slot].name, self.frames, size))
+        return True
+    def stop(self):
+        for _ in self.procs: self.tasks.put(None)
+        for p in self.procs:
+            p.join(timeout=30.0)
+            if p.is_alive(): p.terminate()
+        self.reclaim()
+        self.views = [None] * len(self.views)
+        for shm in self.shms:
+            if shm: shm.close(); shm.unlink()
+        self.shms = [None] * len(self.shms)
+        TELEMETRY.emit("capture", dir=self.dir, fmt=self.fmt, frames=self.frames, written=self.written, dropped=self.dropped)
+        print(f"Captured {self.written}/{self.frames} frames to {self.dir}/ ({self.dropped} dropped)")
+        if self.fmt == "raw":
+            for name in sorted(os.listdir(self.dir)):
+                size = name.rsplit("_", 1)[-1].split(".")[0]
+                print(f"  ffmpeg -f rawvideo -pix_fmt bgra -s {size} -r {FPS_DEFAULT} -i {os.path.join(self.dir, name)} {name[:-5]}.mp4")
+
+def next_capture_dir(root):
+    n = 1
+    while os.path.exists(os.path.join(root, f"take-{n:03d}")): n += 1
+    return os.path.join(root, f"take-{n:03d}")
+
 # ------------------------------
 # App
 # ------------------------------
 class App:
-    def __init__(self):
+    def __init__(self, seed=None, record=None, replay=None, headless=False, telemetry=None, capture=None, capture_format="png"):
+        if headless: os.environ["SDL_VIDEODRIVER"] = "dummy"
+        if telemetry: TELEMETRY.start(telemetry); atexit.register(TELEMETRY.stop)
+        self._frame_stats = {"n": 0, "dt": 0.0, "dt_max": 0.0, "work": 0.0}
         pygame.init()
+        self.replayer = Replayer(replay) if replay else None; self.headless = headless
+        RNG.reseed(self.replayer.header["seed"] if self.replayer else seed)
+        self.save_path = SAVE_FILE
+        if self.replayer: self.save_path = self.replayer.prepare_save(); set_time_source(lambda: self.replayer.ts)
         # Window state
         self.fullscreen = False
-        self.windowed_size = DEFAULT_WINDOWED_SIZE
+        self.windowed_size = tuple(self.replayer.header["size"]) if self.replayer else DEFAULT_WINDOWED_SIZE
         self.flags_windowed = pygame.RESIZABLE | pygame.DOUBLEBUF
         self.flags_full     = pygame.FULLSCREEN | pygame.DOUBLEBUF
         # Create windowed, resizable
         self.screen = pygame.display.set_mode(self.windowed_size, self.flags_windowed)
         pygame.display.set_caption("Idle Racer + Blackjack")
         self.clock = pygame.time.Clock()
+        # Polled input for the current frame (live or replayed)
+        self.mouse_pos = (0, 0); self.keys = ReplayKeys()
         # Fonts
         self.font_small = pygame.font.SysFont("Consolas,DejaVu Sans Mono,Arial", 18)
         self.font_med   = pygame.font.SysFont("Consolas,DejaVu Sans Mono,Arial", 24, bold=True)
         self.font_big   = pygame.font.SysFont("Consolas,DejaVu Sans Mono,Arial", 36, bold=True)
         self.font_huge  = pygame.font.SysFont("Consolas,DejaVu Sans Mono,Arial", 48, bold=True)
         # Game state & scene
-        self.state = GameState(*self.screen.get_size())
+        self.state = self.new_state()
                 # Save on interpreter exit as a safety net
         def _save_at_exit():
             try:
@@ -826,6 +1575,18 @@ class App:
 
         self.scene = MainMenu(self); self.scene.start_fade_in()
         self.last_load_message = ""
+        self.recorder = Recorder(record, self) if record else None
+        self.garage_pool = GaragePool(RNG.seed, inline=bool(self.replayer or record or headless)); atexit.register(self.garage_pool.close)
+        self.capture = None; self.capture_root = capture or CAPTURE_DIR; self.capture_format = capture_format; self._capture_stops = []
+        if capture: self.toggle_capture()
+        atexit.register(self.stop_capture)
+    def new_state(self):
+        gs = GameState(*self.screen.get_size()); gs.save_path = self.save_path
+        # Carry Options-menu settings into a fresh game (a loaded save overrides them)
+        prev = getattr(self, "state", None)
+        if prev is not None:
+            gs.autosave = prev.autosave; gs.enable_particles = prev.enable_particles; gs.fps_cap = prev.fps_cap
+        return gs
     def apply_window_settings(self, size=None, fullscreen=None):
         if size is not None: self.windowed_size = size
         if fullscreen is not None: self.fullscreen = fullscreen
@@ -849,23 +1610,106 @@ class App:
         if isinstance(self.scene, IdleScene): self.scene.last_canvas_size = (0,0)
         w, h = self.screen.get_size(); self.state.re_seed_stars(w, h)
     def change_scene(self, new_scene): self.scene = new_scene; self.scene.start_fade_in()
+    def toggle_capture(self):
+        if self.capture:
+            # The encoders drain their queued frames on a helper thread so the frame loop never waits on them
+            cap = self.capture; self.capture = None
+            self._capture_stops = [t for t in self._capture_stops if t.is_alive()]
+            t = threading.Thread(target=cap.stop, name="capture-stop", daemon=True); t.start(); self._capture_stops.append(t)
+            return
+        try: self.capture = FrameCapture(next_capture_dir(self.capture_root), self.capture_format, block=bool(self.replayer))
+        except Exception as e: print("Frame capture unavailable:", e)
+    def stop_capture(self):
+        # Shutdown only: blocks until this and any toggled-off captures have written every frame
+        if self.capture: self.capture.stop(); self.capture = None
+        for t in self._capture_stops: t.join()
+        self._capture_stops = []
+    def draw_capture_badge(self):
+        # Drawn after grab() so it never ends up in the captured frames
+        cap = self.capture; x = self.screen.get_width() - 150
+        pygame.draw.circle(self.screen, (230, 40, 40), (x, 20), 7)
+        draw_text(self.screen, f"REC {cap.frames}" + (f"  -{cap.dropped}" if cap.dropped else ""), self.font_small, (240, 240, 240), (x + 14, 10))
+    def poll_input(self):
+        if self.replayer:
+            # Uncapped: replays run as fast as update (and draw, if on screen) allow
+            self.clock.tick()
+            for e in pygame.event.get():
+                if e.type == pygame.QUIT: return None
+            frame = self.replayer.poll()
+            if frame is None: return None
+            self.mouse_pos = self.replayer.mouse; self.keys = self.replayer.keys
+            return frame
+        dt = self.clock.tick(self.state.fps_cap) / 1000.0; raw = pygame.event.get()
+        self.mouse_pos = pygame.mouse.get_pos(); self.keys = pygame.key.get_pressed()
+        return dt, raw
+    def sync_replay_size(self):
+        size = self.replayer.size
+        if self.screen.get_size() != size:
+            self.screen = pygame.display.set_mode(size, self.flags_windowed)
+            if isinstance(self.scene, IdleScene): self.scene.last_canvas_size = (0,0)
+            elif hasattr(self.scene, "relayout"): self.scene.relayout()
+    def frame_stats(self, dt, work):
+        # Aggregated into one telemetry event per wall-clock second; dt is the real frame interval
+        # (not the game dt, which a replay takes from the recording)
+        fs = self._frame_stats; fs["n"] += 1; fs["dt"] += dt; fs["dt_max"] = max(fs["dt_max"], dt); fs["work"] += work
+        if fs["dt"] >= 1.0: self.flush_frame_stats()
+    def flush_frame_stats(self):
+        fs = self._frame_stats
+        if fs["n"] and fs["dt"] > 0:
+            TELEMETRY.emit("frame_stats", fps=round(fs["n"] / fs["dt"], 1), dt_avg_ms=round(1000 * fs["dt"] / fs["n"], 2), dt_max_ms=round(1000 * fs["dt_max"], 2),
+                           work_avg_ms=round(1000 * fs["work"] / fs["n"], 2), scene=type(self.scene).__name__, dropped=TELEMETRY.dropped)
+            self._frame_stats = {"n": 0, "dt": 0.0, "dt_max": 0.0, "work": 0.0}
     def run(self):
-        running = True
+        running = True; last = time.perf_counter()
         while running:
-            dt = self.clock.tick(self.state.fps_cap) / 1000.0; events = []
-            for e in pygame.event.get():
+            frame = self.poll_input()
+            if frame is None: break
+            now = time.perf_counter(); wall_dt = now - last; last = now
+            dt, raw = frame; events = []
+            for e in raw:
                 if e.type == pygame.QUIT:
                     try: self.state.save()
                     except Exception as ex: print("Save on exit failed:", ex)
                     running = False
                 elif e.type == pygame.KEYDOWN and e.key == pygame.K_F11:
                     self.toggle_fullscreen()
+                elif e.type == pygame.KEYDOWN and e.key == pygame.K_F9:
+                    # A replay's capture is set from the command line, not by recorded keys
+                    if not self.replayer: self.toggle_capture()
                 elif e.type == pygame.VIDEORESIZE:
                     self.handle_resize(e.w, e.h)
                 else:
                     events.append(e)
-            self.scene.update(dt, events); self.scene.draw(self.screen); pygame.display.flip()
+            if self.replayer: self.sync_replay_size()
+            if self.recorder: self.recorder.frame(dt, raw, self.mouse_pos, self.keys, self.screen.get_size())
+            t0 = time.perf_counter()
+            self.scene.update(dt, events)
+            if not self.headless or self.capture: self.scene.draw(self.screen)
+            if self.capture: self.capture.grab(self.screen)
+            if not self.headless:
+                if self.capture: self.draw_capture_badge()
+                pygame.display.flip()
+            if TELEMETRY.enabled: self.frame_stats(wall_dt, time.perf_counter() - t0)
+        ok = True
+        if TELEMETRY.enabled: self.flush_frame_stats()   # partial last second (short replays)
+        self.stop_capture()
+        TELEMETRY.stop()
+        self.garage_pool.close()
+        if self.recorder: self.recorder.close(self.state)
+        if self.replayer: ok = self.replayer.finish(self.state)
         pygame.quit()
+        return ok
 
 if __name__ == "__main__":
-    App().run()
+    parser = argparse.ArgumentParser(description="Idle Racer + Blackjack")
+    parser.add_argument("--seed", type=int, help="Seed the per-subsystem RNG streams.")
+    parser.add_argument("--record", metavar="FILE", help="Record seed, input and frame timings to FILE.")
+    parser.add_argument("--replay", metavar="FILE", help="Replay a recording as fast as possible and verify its end state.")
+    parser.add_argument("--headless", action="store_true", help="Use the SDL dummy video driver and skip drawing (unless capturing).")
+    parser.add_argument("--telemetry", metavar="DIR", nargs="?", const=TELEMETRY_DIR, help=f"Write session telemetry as JSONL to DIR (default: {TELEMETRY_DIR}/).")
+    parser.add_argument("--capture", metavar="DIR", nargs="?", const=CAPTURE_DIR, help=f"Capture frames from the start into DIR/take-NNN/ (default: {CAPTURE_DIR}/); F9 toggles capture.")
+    parser.add_argument("--capture-format", choices=CAPTURE_FORMATS, default="png", help="Numbered PNG files, or one raw BGRA stream per window size.")
+    args = parser.parse_args()
+    ok = App(seed=args.seed, record=args.record, replay=args.replay, headless=args.headless, telemetry=args.telemetry,
+             capture=args.capture, capture_format=args.capture_format).run()
+    raise SystemExit(0 if ok else 1)
@@ -0,0 +1,66 @@
+
+# Offline summary of the JSONL files written by `main.py --telemetry`.
+#   python telemetry_report.py [DIR]
+import os
+import sys
+import json
+from collections import Counter, defaultdict
+
+def pct(values, p):
+    if not values: return 0.0
+    values = sorted(values); return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+def load_events(directory):
+    events = []; bad = 0
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith("telemetry-") and name.endswith(".jsonl")): continue
+        with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+            for line in f:
+                try: events.append(json.loads(line))
+                except ValueError: bad += 1   # truncated last line of a crashed session
+    return events, bad
+
+def summarize(events):
+    by_ev = defaultdict(list)
+    for e in events: by_ev[e.get("ev")].append(e)
+    out = []
+    sessions = {e["ts"] for e in by_ev["session_start"]}
+    out.append(f"Events: {len(events)}  Sessions: {len(sessions)}  Dropped (reported): {sum(e.get('dropped', 0) for e in by_ev['session_end'])}")
+
+    fs = by_ev["frame_stats"]
+    if fs:
+        fps = [e["fps"] for e in fs]; work = [e["work_avg_ms"] for e in fs]
+        out.append(f"FPS: avg {sum(fps)/len(fps):.1f}  p5 {pct(fps, 5):.1f}  min {min(fps):.1f}   frame work p50 {pct(work, 50):.2f}ms  p95 {pct(work, 95):.2f}ms  worst dt {max(e['dt_max_ms'] for e in fs):.1f}ms")
+        scenes = Counter(e["scene"] for e in fs); out.append("Time by scene (s): " + ", ".join(f"{k} {v}" for k, v in scenes.most_common()))
+
+    laps = by_ev["laps"]
+    if laps:
+        gps = [e["gps"] for e in laps]
+        out.append(f"Gold/sec: avg {sum(gps)/len(gps):.1f}  p50 {pct(gps, 50):.1f}  max {max(gps):.1f}   laps/sec avg {sum(e['lps'] for e in laps)/len(laps):.2f}")
+
+    buys = by_ev["purchase"]
+    if buys:
+        spent = defaultdict(float); count = Counter()
+        for e in buys: spent[e["item"]] += e["cost"]; count[e["item"]] += 1
+        out.append("Purchases: " + ", ".join(f"{k} x{count[k]} ({spent[k]:.0f}g)" for k, _ in count.most_common()))
+
+    if by_ev["prestige"]: out.append(f"Prestiges: {len(by_ev['prestige'])}  (max sponsor level {max(e['sponsor_level'] for e in by_ev['prestige'])})")
+    if by_ev["achievement"]: out.append(f"Achievements: {len(by_ev['achievement'])}  ({', '.join(e['name'] for e in by_ev['achievement'])})")
+
+    bj = by_ev["bj_result"]
+    if bj:
+        outcomes = Counter(e["outcome"] for e in bj); net = sum(e["net"] for e in bj)
+        out.append(f"Blackjack: {len(bj)} rounds, net {net:+.0f}g  " + ", ".join(f"{k} {v} ({100*v/len(bj):.0f}%)" for k, v in outcomes.most_common()))
+
+    saves = [e["ms"] for e in by_ev["save"]]
+    if saves: out.append(f"Saves: {len(saves)}  p50 {pct(saves, 50):.2f}ms  p95 {pct(saves, 95):.2f}ms  max {max(saves):.2f}ms  size {by_ev['save'][-1]['bytes']}B")
+    loads = by_ev["load"]
+    if loads: out.append(f"Loads: {len(loads)} ({sum(1 for e in loads if not e.get('ok'))} failed)  offline earned {sum(e.get('offline_earned', 0) for e in loads):.0f}g")
+    return out
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else "telemetry"
+    if not os.path.isdir(directory): sys.exit(f"No telemetry directory: {directory}")
+    events, bad = load_events(directory)
+    for line in summarize(events): print(line)
+    if bad: print(f"(skipped {bad} unreadable lines)")